@@ -1,7 +1,15 @@
 import numpy as np
-from bs4 import BeautifulSoup
+from bs4 import SoupStrainer
 import re
-import requests
+import http_cache
+import parsing
+import transport
+from address import clean_address
+
+# Backend used for the MHM pages, None uses parsing.DEFAULT_PARSER; 'lxml' only after a parity check (see parsing.py)
+PARSER = None
+# Only the property grid cards are needed from the listing page
+PARSE_ONLY = SoupStrainer('div', class_=parsing.has_class('propgridc'))
 
 def get_MHM(url):
     """
@@ -43,16 +51,16 @@ def get_MHM(url):
         >>> get_MHM('https://invalid-url.com')  # Returns an empty list for an invalid URL
         []
     """
-    session = requests.session()
+    session = transport.get_session('MHM')
     req_header = {'User-Agent':'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/67.0.3396.99 Safari/537.36',}
     name = 'MHM'
-    res = session.get(url,headers = req_header).text
-    soup = BeautifulSoup(res, 'html.parser')
+    res = http_cache.fetch(session, url, headers=req_header).text
+    soup = parsing.make_soup(res, PARSER, PARSE_ONLY)
     units = soup.find_all('div', class_='propgridc')
     Dorms = []
     for unit in units:
         link = unit.find('a')['href']
-        address = unit.find('h2').text
+        address = clean_address(unit.find('h2').text)
         #class_='ppricebox' include more information about each unit
         items = unit.find_all('p', class_='ppricebox')
         is_studio = False
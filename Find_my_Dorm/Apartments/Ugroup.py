@@ -1,14 +1,26 @@
 import numpy as np
-from bs4 import BeautifulSoup
+from bs4 import SoupStrainer
 import re
-import requests
+import http_cache
+import parsing
+import transport
+from address import clean_address
+from fetching import crawl_details
 
-def get_ugroup(url):
+# Backend used for the Ugroup pages, None uses parsing.DEFAULT_PARSER; 'lxml' only after a parity check (see parsing.py)
+PARSER = None
+# Only the property header and the unit tabs are needed from a property page
+DETAIL_PARSE_ONLY = SoupStrainer('div', class_=parsing.has_class('prop_detil_rgt', 'tab-content_in_wrapp'))
+
+def get_ugroup(url, max_workers=8, errors=None, store=None):
     """
         Scrape information about dorms or properties listed on the Ugroup website.
 
         Parameters:
         - url (str): The URL of the Ugroup website's building list.
+        - max_workers (int, optional): Maximum number of detail pages fetched at once (default is 8).
+        - errors (list, optional): If given, a (link, exception) pair is appended for every detail page that failed.
+        - store (incremental.FingerprintStore, optional): If given, detail pages that did not change since the last run are not parsed again.
 
         Returns:
         - list: A list of lists, where each inner list represents information about a dorm.
@@ -41,51 +53,58 @@ def get_ugroup(url):
         []
     """
 
-    session = requests.session()
+    session = transport.get_session('Ugroup')
     req_header = {'User-Agent':'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/67.0.3396.99 Safari/537.36',}
     name = 'Ugroup'
-    re = session.get(url,headers = req_header).text
-    soup = BeautifulSoup(re, 'html.parser')
+    re = http_cache.fetch(session, url, headers=req_header).text
+    soup = parsing.make_soup(re, PARSER)
     Dorms = []
     if soup == None:
         return Dorms
 
-    for a in soup.find_all('a', class_='more_detail'):
-        if not a.has_attr('href'):
-            continue
-        link = a['href']
-        #Open the specific link for information of each apartment
-        res = session.get(link,headers = req_header).text
-        soup = BeautifulSoup(res, 'html.parser')
-        #Some links on the website is invalid, eg. https://ugroupcu.com/property-details/104-e-armory-immediate-move-in-and-january-2024
-        if soup.find('div', class_='prop_detil_rgt') is None:
-            continue   
-        address = soup.find('div', class_='prop_detil_rgt').find('h2').text
-        if soup.find('div', class_='prop_detil_rgt') is None:
-            continue   
-        kinds = soup.find_all('div', class_='tab-content_in_wrapp tab-cntnt_wrap_btm')
-        #kinds include more details about the apartment
-        for kind in kinds:
-            lookup = {}
-            for li in kind.find('div', class_='tab-content_in_rgt').find_all('li'):
-                divs = li.find_all('div')
-                lookup[divs[0].text.strip()] = divs[1].text.strip()
-                price = float(lookup['Price per month:'].replace('$', '').replace(',', ''))
-                bathroom = float(lookup.get('Bathrooms:', 0))
-                availability = str(lookup.get('Availability:')).lower()
-                bedrooms_text = kind.find('h4', class_='propert_head').text.strip()
-                bedrooms_text = bedrooms_text.strip('Luxury').strip()
-                if 'studio' in bedrooms_text.lower():
-                    is_studio = True
-                    bedroom = 1
-                else:
-                    is_studio = False
-                    try :
-                        bedroom = int(bedrooms_text[0])
-                    except ValueError:
-                        # use np.nan for not published bedroom
-                        bedroom = np.nan
-        
-            Dorms.append([address, price, bedroom, bathroom, link, availability, name, is_studio])
+    #Each card on the building list links to the detail page of one property
+    links = [a['href'] for a in soup.find_all('a', class_='more_detail') if a.has_attr('href')]
+    #Open the specific link for information of each apartment, in parallel and in the original order
+    parse = lambda html, link: parse_ugroup_page(html, link, name)
+    Dorms.extend(crawl_details(session, links, parse, headers=req_header, max_workers=max_workers,
+                               errors=errors, store=store))
     return Dorms
 
+def parse_ugroup_page(html, link, name='Ugroup'):
+    """
+        Parse one Ugroup property detail page.
+
+        Returns:
+        - list: A list of lists in the same format as get_ugroup, one per kind of unit on the page.
+    """
+    soup = parsing.make_soup(html, PARSER, DETAIL_PARSE_ONLY)
+    Dorms = []
+    #Some links on the website is invalid, eg. https://ugroupcu.com/property-details/104-e-armory-immediate-move-in-and-january-2024
+    if soup.find('div', class_='prop_detil_rgt') is None:
+        return Dorms
+    address = clean_address(soup.find('div', class_='prop_detil_rgt').find('h2').text)
+    kinds = soup.find_all('div', class_='tab-content_in_wrapp tab-cntnt_wrap_btm')
+    #kinds include more details about the apartment
+    for kind in kinds:
+        lookup = {}
+        for li in kind.find('div', class_='tab-content_in_rgt').find_all('li'):
+            divs = li.find_all('div')
+            lookup[divs[0].text.strip()] = divs[1].text.strip()
+            price = float(lookup['Price per month:'].replace('$', '').replace(',', ''))
+            bathroom = float(lookup.get('Bathrooms:', 0))
+            availability = str(lookup.get('Availability:')).lower()
+            bedrooms_text = kind.find('h4', class_='propert_head').text.strip()
+            bedrooms_text = bedrooms_text.strip('Luxury').strip()
+            if 'studio' in bedrooms_text.lower():
+                is_studio = True
+                bedroom = 1
+            else:
+                is_studio = False
+                try :
+                    bedroom = int(bedrooms_text[0])
+                except ValueError:
+                    # use np.nan for not published bedroom
+                    bedroom = np.nan
+
+        Dorms.append([address, price, bedroom, bathroom, link, availability, name, is_studio])
+    return Dorms
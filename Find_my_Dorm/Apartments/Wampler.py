@@ -1,9 +1,17 @@
-from bs4 import BeautifulSoup
+from bs4 import SoupStrainer
 import re
-import requests
+import parsing
+import transport
+from address import clean_address
+from fetching import crawl_details
 import numpy as np
 
-def get_wampler(url):
+# Backend used for the Wampler pages, None uses parsing.DEFAULT_PARSER; 'lxml' only after a parity check (see parsing.py)
+PARSER = None
+# Only the address and the detail rows are needed from a property page
+DETAIL_PARSE_ONLY = SoupStrainer(class_=parsing.has_class('listing-address', 'single-detail'))
+
+def get_wampler(url, max_workers=8, errors=None, store=None):
 
     """
         url = 'https://wamplerapartments.com/our-properties/'
@@ -12,6 +20,9 @@ def get_wampler(url):
 
         Parameters:
         - url (str): The URL of the Wampler website's property listing page.
+        - max_workers (int, optional): Maximum number of detail pages fetched at once (default is 8).
+        - errors (list, optional): If given, a (link, exception) pair is appended for every detail page that failed.
+        - store (incremental.FingerprintStore, optional): If given, detail pages that did not change since the last run are not parsed again.
 
         Returns:
         - list: A list of lists, where each inner list represents information about an apartment.
@@ -43,43 +54,52 @@ def get_wampler(url):
         >>> get_wampler('https://invalid-url.com')  # Returns an empty list for an invalid URL
         []
     """
-    session = requests.session()
+    session = transport.get_session('Wampler')
     req_header = {'User-Agent':'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/67.0.3396.99 Safari/537.36',}
     name ='Wampler'
     re = session.post(url,headers=req_header).text
-    soup = BeautifulSoup(re, 'html.parser')
+    soup = parsing.make_soup(re, PARSER)
     Dorms = []
     if soup == None:
         return Dorms
-    for a in soup.find_all('a', class_='more-link'):
-        link = a['href']
-        res = session.get(link).text
-        soup = BeautifulSoup(res, 'html.parser')
-        address = soup.find('h3', class_='listing-address').text.strip(',Illinois').strip('/ Urb')
-        lookup = {}
-        for div in soup.find_all('div', class_='single-detail'):
-            spans = div.find_all('span')
-            lookup[spans[0].text.strip()] = spans[1].text.strip()
-        if lookup['Bedrooms:'] == 'Studio':
-            bedroom = 1
-            is_studio = True
-        else:
-            bedroom = int(lookup['Bedrooms:'].split(' ')[0])
-            is_studio = False
-        bathroom = float(lookup['Bathrooms:'])
-        available = lookup['Rent:'].upper() != 'LEASED'
-        if available:
-            availability = '2024-08'
-            if lookup['Rent:'][0].isalpha():
-                # use np.nan in Numpy to represent unavailable price
-                price = np.nan
-            else:
-                price = float(lookup['Rent:'].replace('$', '').replace(',', '').split('-')[-1].strip('/mo'))
-        else:
-            available_date = None
-            # use np.nan in Numpy to represent unavailable price
-            price = np.nan
-            continue
-        Dorms.append([address, price, bedroom, bathroom, link, availability, name, is_studio])
+    #Each card on the index page links to the detail page of one property
+    links = [a['href'] for a in soup.find_all('a', class_='more-link')]
+    #Fetch the detail pages in parallel, the results keep the order of the cards
+    def parse(html, link):
+        dorm = parse_wampler_page(html, link, name)
+        return [] if dorm is None else [dorm]
+    Dorms.extend(crawl_details(session, links, parse, headers=req_header, max_workers=max_workers,
+                               errors=errors, store=store))
     return Dorms
 
+def parse_wampler_page(html, link, name='Wampler'):
+    """
+        Parse one Wampler property detail page.
+
+        Returns:
+        - list or None: The apartment information in the same format as get_wampler, or None if the unit is leased.
+    """
+    soup = parsing.make_soup(html, PARSER, DETAIL_PARSE_ONLY)
+    address = clean_address(soup.find('h3', class_='listing-address').text)
+    lookup = {}
+    for div in soup.find_all('div', class_='single-detail'):
+        spans = div.find_all('span')
+        lookup[spans[0].text.strip()] = spans[1].text.strip()
+    if lookup['Bedrooms:'] == 'Studio':
+        bedroom = 1
+        is_studio = True
+    else:
+        bedroom = int(lookup['Bedrooms:'].split(' ')[0])
+        is_studio = False
+    bathroom = float(lookup['Bathrooms:'])
+    available = lookup['Rent:'].upper() != 'LEASED'
+    if available:
+        availability = '2024-08'
+        if lookup['Rent:'][0].isalpha():
+            # use np.nan in Numpy to represent unavailable price
+            price = np.nan
+        else:
+            price = float(lookup['Rent:'].replace('$', '').replace(',', '').split('-')[-1].strip('/mo'))
+    else:
+        return None
+    return [address, price, bedroom, bathroom, link, availability, name, is_studio]
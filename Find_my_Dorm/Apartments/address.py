@@ -0,0 +1,134 @@
+import re
+from functools import lru_cache
+
+# Cities and state the agencies append to an address, in any of their spellings
+CITIES = ('Champaign', 'Urbana', 'Savoy')
+STATES = ('IL', 'Illinois')
+DIRECTIONS = {'north': 'N', 'south': 'S', 'east': 'E', 'west': 'W'}
+SUFFIXES = {
+    'street': 'St',
+    'avenue': 'Ave',
+    'drive': 'Dr',
+    'boulevard': 'Blvd',
+    'court': 'Ct',
+    'place': 'Pl',
+    'lane': 'Ln',
+    'road': 'Rd',
+}
+UNITS = ('Apartment', 'Apt', 'Unit', 'Suite', 'Ste')
+
+_cities = '|'.join(CITIES)
+_states = '|'.join(STATES)
+_units = '|'.join(UNITS)
+_suffixes = '|'.join(list(SUFFIXES) + list(SUFFIXES.values()))
+# What may follow a street suffix that ends the street name
+_name_end = rf'(?:$|-| #| (?:{_units})\b)'
+
+# Applied in order to every address. All patterns are compiled once, at import.
+_RULES = [
+    # Runs of whitespace, e.g. Green Street's 'Champaign  IL'
+    (re.compile(r'\s+'), ' '),
+    # Leasing notes appended to the address, e.g. ' - January 2024'
+    (re.compile(r' - .*$'), ''),
+    # A trailing city, optionally followed by the state and ZIP code: ', Champaign', '. / Urbana,', ' – Urbana'
+    (re.compile(rf'(?:\s*[,/–—]\s*|\s+)(?:{_cities})(?:\s*,?\s*(?:{_states}))?(?:\s*\d{{5}}(?:-\d{{4}})?)?[\s,/]*$', re.I), ''),
+    # A trailing state without a city: ', Illinois'
+    (re.compile(rf'\s*,\s*(?:{_states})(?:\s*\d{{5}})?[\s,/]*$', re.I), ''),
+    # Abbreviation periods, but not the decimal point of '807.5 W. Main'
+    (re.compile(r'(?<=[A-Za-z])\.'), ''),
+    (re.compile(r'\s*,\s*'), ' '),
+    (re.compile(r'[\s/]+$'), ''),
+    # Spelled-out directions after the house number: '401 West Elm St', but not the
+    # street name itself: '101 East St' has no other name token after the direction
+    (re.compile(rf'^(\S*\d\S*(?: ½)?) (North|South|East|West)(?= (?!(?:{_suffixes}){_name_end})\S)', re.I),
+     lambda m: f"{m.group(1)} {DIRECTIONS[m.group(2).lower()]}"),
+    # Spelled-out street suffixes, when they end the street name
+    (re.compile(rf'\b({"|".join(SUFFIXES)})\b(?={_name_end})', re.I),
+     lambda m: SUFFIXES[m.group(1).lower()]),
+]
+# The unit part of an address: 'Apartment 5', 'Unit #B', '#2' or JSJ's '-1'
+_UNIT = re.compile(rf'(?:-\w+| #\s*\w+| (?:{_units})\b\s*#?\s*\w+)$', re.I)
+
+
+@lru_cache(maxsize=65536)
+def clean_address(address, building=False):
+    """
+    Normalize a scraped address: drop the city and state, abbreviate the street suffix
+    and directions, and tidy punctuation and whitespace.
+
+    Results are memoized, so an address seen before (the same building is listed once
+    per unit) is not cleaned again.
+
+    Parameters:
+    - address (str): The address as scraped; anything that is not a string is returned unchanged.
+    - building (bool, optional): Also drop the unit, so all units of a building share one address.
+
+    Returns:
+    - str: The normalized address.
+
+    >>> clean_address('106 E. John St. / Champaign,')
+    '106 E John St'
+    >>> clean_address('123 Green St, Champaign  IL')
+    '123 Green St'
+    >>> clean_address('401 West Elm Street')
+    '401 W Elm St'
+    >>> clean_address('101 East St'), clean_address('1 West Avenue'), clean_address('1 West Ave Apt 2')
+    ('101 East St', '1 West Ave', '1 West Ave Apt 2')
+    >>> clean_address('907 S. Fourth St. – Champaign'), clean_address('1010 W. Oregon St. — Urbana, IL')
+    ('907 S Fourth St', '1010 W Oregon St')
+    >>> clean_address('807.5 W. Main, Urbana')
+    '807.5 W Main'
+    >>> clean_address('204 N Neil Street Unit #B'), clean_address('204 N Neil Street Unit #B', building=True)
+    ('204 N Neil St Unit #B', '204 N Neil St')
+    """
+    if not isinstance(address, str):
+        return address
+    for pattern, replacement in _RULES:
+        address = pattern.sub(replacement, address)
+    if building:
+        address = _UNIT.sub('', address)
+    return address.strip()
+
+
+def address_key(address):
+    """
+    The cache key of an address: its building, lowercased, so that every spelling and
+    every unit of a building share one geocoding or rating cache entry.
+
+    >>> address_key('106 E. John Street, Champaign')
+    '106 e john st'
+    >>> address_key('106 E John St Apt 4') == address_key('106 e. john st, champaign')
+    True
+    """
+    return clean_address(address, building=True).lower()
+
+
+def normalize_addresses(addresses, building=False):
+    """
+    Normalize a whole column of addresses at once.
+
+    Every distinct address is cleaned only once (and only once per process, see
+    clean_address); the results are spread back to the rows by their codes.
+
+    Parameters:
+    - addresses (pandas.Series or list): The scraped addresses; missing ones come back as NaN.
+    - building (bool, optional): Also drop the units, see clean_address.
+
+    Returns:
+    - pandas.Series: The normalized addresses, with the index of ``addresses``.
+
+    >>> normalize_addresses(['501 E. Healey, Champaign', '501 E Healey', None, '54 East Green Street']).tolist()
+    ['501 E Healey', '501 E Healey', nan, '54 E Green St']
+    """
+    import numpy as np
+    import pandas as pd
+    addresses = pd.Series(addresses, dtype=object) if not isinstance(addresses, pd.Series) else addresses
+    codes, uniques = pd.factorize(addresses)
+    cleaned = np.array([clean_address(address, building) for address in uniques] + [np.nan], dtype=object)
+    # Missing addresses have code -1, which picks the trailing NaN
+    return pd.Series(cleaned[codes], index=addresses.index, name=addresses.name)
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -1,4 +1,5 @@
-from bs4 import BeautifulSoup
+from bs4 import SoupStrainer
+from address import clean_address
 from public import Apartment, ApartmentScraper
 
 
@@ -7,6 +8,7 @@ class Bailey(ApartmentScraper):
     A scraper class that inherits from ApartmentScraper to parse apartment listings
     from the Bailey Apartments Official website.
     """
+    parse_only = SoupStrainer('table', id='tablepress-2')
 
     def parse_data(self):
         """
@@ -18,7 +20,7 @@ class Bailey(ApartmentScraper):
         """
         # Fetch the HTML data
         html = self.fetch_data()
-        soup = BeautifulSoup(html, 'html.parser')
+        soup = self.make_soup(html)
 
         # Find the table with apartment listings by ID
         table = soup.find('table', id='tablepress-2')
@@ -52,7 +54,7 @@ class Bailey(ApartmentScraper):
         price = self.get_price(data['Price (per month)'])
         link = f'http://baileyapartments.com/amenities/{slug}'
         available_date = self.get_available_date(data['Availability (AVAILABLE 2023-2024)'])
-        return Apartment(address, price, bedrooms, bathrooms, link, available_date, self.agency_name, is_studio)
+        return Apartment(clean_address(address), price, bedrooms, bathrooms, link, available_date, self.agency_name, is_studio)
 
     @staticmethod
     def slugify(address):
@@ -0,0 +1,169 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from requests.adapters import HTTPAdapter
+
+import http_cache
+
+
+class HostLimiter:
+    """
+    Caps the number of requests that may be in flight against a single host.
+
+    Sessions built by ``transport.make_session`` take ``limiter.slot(url)`` around
+    every request, so running many agencies (or many detail pages) at once never
+    opens more than ``max_per_host`` connections to one site.
+    """
+
+    def __init__(self, max_per_host=4):
+        self.max_per_host = max_per_host
+        self._lock = threading.Lock()
+        self._semaphores = {}
+
+    @staticmethod
+    def host(url):
+        """
+        Return the host part of a URL, used as the key for the limit.
+
+        >>> HostLimiter.host('https://ugroupcu.com/building-list/')
+        'ugroupcu.com'
+        >>> HostLimiter.host('http://baileyapartments.com:8080/amenities/')
+        'baileyapartments.com'
+        """
+        return (urlparse(url).hostname or '').lower()
+
+    def slot(self, url):
+        """
+        Return the semaphore guarding the host of ``url``; use it as a context manager.
+
+        >>> limiter = HostLimiter(max_per_host=2)
+        >>> with limiter.slot('https://jsmliving.com/search-available-units'):
+        ...     pass
+        >>> limiter.slot('https://jsmliving.com/a') is limiter.slot('https://jsmliving.com/b')
+        True
+        """
+        host = self.host(url)
+        with self._lock:
+            semaphore = self._semaphores.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.max_per_host)
+                self._semaphores[host] = semaphore
+        return semaphore
+
+
+class LimitedAdapter(HTTPAdapter):
+    """
+    A requests transport adapter that takes a host slot from a HostLimiter
+    for the duration of every request sent through it.
+    """
+
+    def __init__(self, limiter, **kwargs):
+        self.limiter = limiter
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        with self.limiter.slot(request.url):
+            return super().send(request, **kwargs)
+
+
+# Shared by every scraper so that the limits hold across the whole refresh
+default_limiter = HostLimiter()
+
+
+class PageResult:
+    """The outcome of fetching one detail page: its text, or the error that stopped it."""
+
+    def __init__(self, link, text=None, error=None):
+        self.link = link
+        self.text = text
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        status = f'{len(self.text)} chars' if self.ok else f'failed: {self.error!r}'
+        return f"<PageResult {self.link} {status}>"
+
+
+def fetch_pages(session, links, headers=None, max_workers=8):
+    """
+    Fetch many pages in parallel with a bounded thread pool.
+
+    Results come back in the order of ``links``. Pages go through the shared HTTP
+    cache. A page that fails is returned as a PageResult carrying the exception
+    instead of aborting the other fetches.
+
+    Parameters:
+    - session (requests.Session): The session to fetch with.
+    - links (list of str): The URLs to fetch.
+    - headers (dict, optional): Extra request headers.
+    - max_workers (int, optional): Maximum number of pages fetched at once (default is 8).
+
+    Returns:
+    - list of PageResult: One result per link, in the original order.
+    """
+    def fetch(link):
+        try:
+            response = http_cache.fetch(session, link, headers=headers)
+            response.raise_for_status()
+            return PageResult(link, text=response.text)
+        except Exception as e:
+            return PageResult(link, error=e)
+
+    if not links:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(links))) as pool:
+        return list(pool.map(fetch, links))
+
+
+def crawl_details(session, links, parse, headers=None, max_workers=8, errors=None, store=None):
+    """
+    Fetch and parse the detail page behind every index card, in parallel.
+
+    Every page is requested on every run. Through the shared HTTP cache an old page is
+    revalidated with a conditional GET, so an unchanged page costs a 304 rather than a
+    download. An index card is never trusted in place of its page: prices, bedrooms and
+    "leased" only show on the detail page.
+
+    Parameters:
+    - session (requests.Session): The session to fetch with.
+    - links (list of str): The detail page URLs, in index order.
+    - parse (callable): parse(html, link) returning the list of rows found on a detail page.
+    - headers (dict, optional): Extra request headers.
+    - max_workers (int, optional): Maximum number of pages fetched at once (default is 8).
+    - errors (list, optional): If given, a (link, exception) pair is appended for every page that failed.
+    - store (incremental.FingerprintStore, optional): When given, pages whose fingerprint is
+      unchanged since the last run are not parsed again; the stored rows are used instead.
+      A page that failed contributes its rows from the last run, so a timeout or a 5xx
+      does not look like the listings were taken down.
+
+    Returns:
+    - list: The rows of all detail pages, in index order.
+    """
+    Dorms = []
+    for page in fetch_pages(session, links, headers=headers, max_workers=max_workers):
+        try:
+            if not page.ok:
+                raise page.error
+            rows = store.cached_rows('page:' + page.link, page.text) if store is not None else None
+            if rows is None:
+                rows = parse(page.text, page.link)
+                if store is not None:
+                    store.remember('page:' + page.link, page.text, rows)
+        except Exception as e:
+            #A broken detail page is reported and skipped, the rest of the crawl goes on
+            if errors is not None:
+                errors.append((page.link, e))
+            if store is not None:
+                Dorms.extend(store.previous_rows('page:' + page.link))
+            continue
+        Dorms.extend(rows)
+    return Dorms
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
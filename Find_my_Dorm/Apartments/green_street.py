@@ -1,9 +1,12 @@
-from bs4 import BeautifulSoup
+from bs4 import SoupStrainer
+from address import clean_address
+from parsing import has_class
 from public import Apartment, ApartmentScraper
 
 
 class Green_Street(ApartmentScraper):
     terms = ['Available August 2024']
+    parse_only = SoupStrainer('div', class_=has_class('property-item-data'))
 
     def parse_data(self):
         """Fetch and parse apartment listings."""
@@ -11,7 +14,7 @@ class Green_Street(ApartmentScraper):
             self.url, headers={'content-type': 'application/x-www-form-urlencoded'},
             data={'query': '/'.join(self.terms), 'show_map': False}
         ).text
-        soup = BeautifulSoup(response, 'html.parser')
+        soup = self.make_soup(response)
         return [self._parse_div(div) for div in soup.find_all('div', class_='property-item-data') if self._parse_div(div)]
 
     def _parse_div(self, div):
@@ -38,8 +41,7 @@ class Green_Street(ApartmentScraper):
         """
         address_div = div.find('div', class_='property-item-title')
         # Strip the city names from the address
-        address = address_div.get_text(strip=True).split(',')[0].strip().replace('Champaign  IL', '').replace('Urbana  IL', '')
-        return address
+        return clean_address(address_div.get_text(strip=True))
 
     def _get_link(self, div):
         """
@@ -0,0 +1,235 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+
+from requests.exceptions import HTTPError
+
+
+# Every on-disk cache of the project lives here; the other modules import this name
+CACHE_DIR = os.environ.get('FIND_MY_DORM_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'find_my_dorm'))
+
+
+class CachedResponse:
+    """
+    The parts of a requests.Response the scrapers use, served from the cache or the network.
+
+    ``from_cache`` is True for a fresh local hit, ``revalidated`` is True when the
+    server answered 304 Not Modified and the stored body was reused.
+    """
+
+    def __init__(self, url, status_code, content, encoding, headers, from_cache=False, revalidated=False):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.encoding = encoding
+        self.headers = headers
+        self.from_cache = from_cache
+        self.revalidated = revalidated
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise HTTPError(f"{self.status_code} error for url: {self.url}", response=self)
+
+    def __repr__(self):
+        source = 'cache' if self.from_cache else ('304' if self.revalidated else 'network')
+        return f"<CachedResponse [{self.status_code}] {self.url} from {source}>"
+
+
+class CacheStats:
+    """Counters for one HTTPCache: how often it avoided a download and what that saved."""
+
+    def __init__(self):
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.seconds_saved = 0.0
+
+    @property
+    def hit_rate(self):
+        """
+        Share of lookups that did not need a full download.
+
+        >>> stats = CacheStats()
+        >>> stats.hits, stats.revalidated, stats.misses = 3, 1, 4
+        >>> stats.hit_rate
+        0.5
+        """
+        total = self.hits + self.revalidated + self.misses
+        return (self.hits + self.revalidated) / total if total else 0.0
+
+    def __repr__(self):
+        return (f"<CacheStats hits={self.hits} revalidated={self.revalidated} misses={self.misses} "
+                f"saved={self.bytes_saved} bytes/{self.seconds_saved:.2f}s>")
+
+
+class HTTPCache:
+    """
+    A persistent on-disk cache for GET requests, shared by every scraper.
+
+    Entries younger than the TTL of their host are served locally. Older entries are
+    revalidated with If-None-Match / If-Modified-Since, so an unchanged page costs a
+    304 instead of a full download. When the stored bodies exceed ``max_bytes`` the
+    least recently used entries are evicted.
+
+    >>> import tempfile
+    >>> cache = HTTPCache(os.path.join(tempfile.mkdtemp(), 'http.sqlite'), ttls={'jsmliving.com': 60})
+    >>> cache.ttl('https://jsmliving.com/search-available-units'), cache.ttl('https://ugroupcu.com/')
+    (60, 3600)
+    """
+
+    def __init__(self, path=None, max_bytes=256 * 1024 * 1024, default_ttl=3600, ttls=None):
+        self.path = path or os.path.join(CACHE_DIR, 'http.sqlite')
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.ttls = ttls or {}
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            'url TEXT PRIMARY KEY, status INTEGER, headers TEXT, body BLOB, encoding TEXT, '
+            'etag TEXT, last_modified TEXT, stored_at REAL, last_used REAL, size INTEGER, fetch_seconds REAL)'
+        )
+        self._db.commit()
+
+    def ttl(self, url):
+        """Return the number of seconds a response from the host of ``url`` stays fresh."""
+        return self.ttls.get((urlparse(url).hostname or '').lower(), self.default_ttl)
+
+    def _lookup(self, url):
+        with self._lock:
+            return self._db.execute(
+                'SELECT status, headers, body, encoding, etag, last_modified, stored_at, size, fetch_seconds '
+                'FROM responses WHERE url = ?', (url,)
+            ).fetchone()
+
+    def _count(self, outcome, bytes_saved=0, seconds_saved=0.0):
+        with self._lock:
+            setattr(self.stats, outcome, getattr(self.stats, outcome) + 1)
+            self.stats.bytes_saved += bytes_saved
+            self.stats.seconds_saved += seconds_saved
+
+    def _touch(self, url, refreshed=False):
+        now = time.time()
+        with self._lock:
+            if refreshed:
+                self._db.execute('UPDATE responses SET stored_at = ?, last_used = ? WHERE url = ?', (now, now, url))
+            else:
+                self._db.execute('UPDATE responses SET last_used = ? WHERE url = ?', (now, url))
+            self._db.commit()
+
+    def _store(self, url, response, seconds):
+        cache_control = response.headers.get('Cache-Control', '').lower()
+        if response.status_code != 200 or 'no-store' in cache_control:
+            return
+        content = response.content
+        encoding = response.encoding or response.apparent_encoding
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (url, response.status_code, json.dumps(dict(response.headers)), content, encoding,
+                 response.headers.get('ETag'), response.headers.get('Last-Modified'),
+                 now, now, len(content), seconds)
+            )
+            self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        total = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for url, size in self._db.execute('SELECT url, size FROM responses ORDER BY last_used').fetchall():
+            self._db.execute('DELETE FROM responses WHERE url = ?', (url,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def get(self, session, url, headers=None, **kwargs):
+        """
+        GET ``url`` through ``session``, answering from the cache whenever possible.
+
+        Parameters:
+        - session (requests.Session): The session used when the network is needed.
+        - url (str): The URL to fetch.
+        - headers (dict, optional): Extra request headers.
+
+        Returns:
+        - CachedResponse: The response, with ``from_cache`` / ``revalidated`` telling how it was served.
+        """
+        row = self._lookup(url)
+        if row is not None:
+            status, stored_headers, body, encoding, etag, last_modified, stored_at, size, fetch_seconds = row
+            if time.time() - stored_at < self.ttl(url):
+                self._touch(url)
+                self._count('hits', size, fetch_seconds)
+                return CachedResponse(url, status, body, encoding, json.loads(stored_headers), from_cache=True)
+            headers = dict(headers or {})
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+
+        start = time.perf_counter()
+        response = session.get(url, headers=headers, **kwargs)
+        seconds = time.perf_counter() - start
+
+        if row is not None and response.status_code == 304:
+            self._touch(url, refreshed=True)
+            self._count('revalidated', size, max(0.0, fetch_seconds - seconds))
+            return CachedResponse(url, status, body, encoding, json.loads(stored_headers), revalidated=True)
+
+        self._count('misses')
+        self._store(url, response, seconds)
+        return CachedResponse(url, response.status_code, response.content,
+                              response.encoding or response.apparent_encoding, dict(response.headers))
+
+    def clear(self):
+        """Remove every stored response."""
+        with self._lock:
+            self._db.execute('DELETE FROM responses')
+            self._db.commit()
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def default_cache():
+    """Return the cache shared by every scraper, creating it on first use."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = HTTPCache()
+        return _default_cache
+
+
+def set_default_cache(cache):
+    """Replace the shared cache, e.g. with one in another directory. Pass False to disable caching."""
+    global _default_cache
+    with _default_cache_lock:
+        _default_cache = cache
+
+
+def fetch(session, url, headers=None, **kwargs):
+    """
+    GET ``url`` through the shared cache, or straight through ``session`` when caching is disabled.
+    """
+    cache = default_cache()
+    if cache is False:
+        return session.get(url, headers=headers, **kwargs)
+    return cache.get(session, url, headers=headers, **kwargs)
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
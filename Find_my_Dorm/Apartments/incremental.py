@@ -0,0 +1,170 @@
+import hashlib
+import json
+import math
+import os
+import threading
+
+from http_cache import CACHE_DIR
+from public import Apartment
+
+
+def fingerprint(content):
+    """
+    Return a short content fingerprint of a page.
+
+    >>> fingerprint('<div>101 Green St</div>') == fingerprint('<div>101 Green St</div>')
+    True
+    >>> fingerprint('<div>101 Green St</div>') == fingerprint('<div>102 Green St</div>')
+    False
+    """
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return hashlib.sha1(content).hexdigest()
+
+
+class FingerprintStore:
+    """
+    Remembers, between runs, the fingerprint of every detail page together with the
+    rows parsed from it, plus the last snapshot of each source.
+
+    A scraper asks ``cached_rows(key, content)`` before parsing: if the content has
+    the same fingerprint as last time the stored rows are returned and the page does
+    not have to be parsed again.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(CACHE_DIR, 'fingerprints.json')
+        self.reused = 0
+        self.parsed = 0
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._snapshots = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                data = json.load(f)
+            self._entries = data.get('entries', {})
+            self._snapshots = data.get('snapshots', {})
+        self._seen = set()
+
+    def cached_rows(self, key, content):
+        """
+        Return the rows stored for ``key`` if ``content`` is unchanged, otherwise None.
+
+        >>> store = FingerprintStore('/nonexistent/fingerprints.json')
+        >>> store.remember('page:http://a', '<p>1</p>', [['1 Main St', 900.0]])
+        >>> store.cached_rows('page:http://a', '<p>1</p>')
+        [['1 Main St', 900.0]]
+        >>> store.cached_rows('page:http://a', '<p>2</p>') is None
+        True
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry['fingerprint'] != fingerprint(content):
+                return None
+            self._seen.add(key)
+            self.reused += 1
+            return [list(row) for row in entry['rows']]
+
+    def remember(self, key, content, rows):
+        """Store the fingerprint of ``content`` and the rows parsed from it under ``key``."""
+        with self._lock:
+            self._entries[key] = {'fingerprint': fingerprint(content), 'rows': [list(row) for row in rows]}
+            self._seen.add(key)
+            self.parsed += 1
+
+    def previous_rows(self, key):
+        """
+        Return the rows stored for ``key`` by an earlier run, whatever the page holds now,
+        and keep its entry; empty if there is none.
+
+        Used for a page that could not be fetched or parsed this run, so that it is not
+        taken for a page whose listings were removed.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return []
+            self._seen.add(key)
+            return [list(row) for row in entry['rows']]
+
+    def snapshot(self, source_name):
+        """Return the rows of ``source_name`` from the previous run (empty on the first run)."""
+        return [list(row) for row in self._snapshots.get(source_name, [])]
+
+    def set_snapshot(self, source_name, rows):
+        self._snapshots[source_name] = [list(row) for row in rows]
+
+    def save(self):
+        """Write the store to disk, dropping pages that were not seen this run."""
+        with self._lock:
+            entries = {key: entry for key, entry in self._entries.items() if key in self._seen}
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump({'entries': entries, 'snapshots': self._snapshots}, f)
+            os.replace(tmp_path, self.path)
+            self._entries = entries
+
+
+class ListingDelta:
+    """The Apartment records added, removed and changed since the previous run."""
+
+    def __init__(self, added, removed, changed):
+        self.added = added
+        self.removed = removed
+        # list of (old Apartment, new Apartment) pairs
+        self.changed = changed
+
+    def __len__(self):
+        return len(self.added) + len(self.removed) + len(self.changed)
+
+    def __repr__(self):
+        return f"<ListingDelta +{len(self.added)} -{len(self.removed)} ~{len(self.changed)}>"
+
+
+def _clean(value):
+    # NaN never equals itself, so it cannot be part of a key or a comparison
+    return None if isinstance(value, float) and math.isnan(value) else value
+
+
+def _keyed(rows):
+    keyed = {}
+    for row in rows:
+        address, price, bedroom, bathroom, link, availability, name, is_studio = [_clean(v) for v in row]
+        key = (name, link, address, bedroom, bathroom, is_studio)
+        ordinal = 0
+        while (key, ordinal) in keyed:
+            ordinal += 1
+        keyed[(key, ordinal)] = row
+    return keyed
+
+
+def diff_listings(old_rows, new_rows):
+    """
+    Compare two snapshots of listing rows.
+
+    A listing is identified by its agency, link, address, bedrooms, bathrooms and
+    studio flag; a listing whose price or availability moved counts as changed.
+
+    >>> old = [['1 Main St', 900.0, 1, 1.0, 'http://a/1', '2024-08', 'Wampler', False],
+    ...        ['2 Main St', 1000.0, 2, 1.0, 'http://a/2', '2024-08', 'Wampler', False]]
+    >>> new = [['1 Main St', 950.0, 1, 1.0, 'http://a/1', '2024-08', 'Wampler', False],
+    ...        ['3 Main St', 1200.0, 3, 2.0, 'http://a/3', '2024-08', 'Wampler', False]]
+    >>> delta = diff_listings(old, new)
+    >>> delta
+    <ListingDelta +1 -1 ~1>
+    >>> delta.changed
+    [(<Apartment $900.0/month 1 beds/1.0 baths 2024-08 Wampler>, <Apartment $950.0/month 1 beds/1.0 baths 2024-08 Wampler>)]
+    """
+    old = _keyed(old_rows)
+    new = _keyed(new_rows)
+    added = [Apartment(*new[key]) for key in new if key not in old]
+    removed = [Apartment(*old[key]) for key in old if key not in new]
+    changed = [(Apartment(*old[key]), Apartment(*new[key])) for key in new
+               if key in old and [_clean(v) for v in old[key]] != [_clean(v) for v in new[key]]]
+    return ListingDelta(added, removed, changed)
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
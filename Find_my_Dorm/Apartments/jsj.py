@@ -1,5 +1,6 @@
 import json
-from bs4 import BeautifulSoup
+from bs4 import SoupStrainer
+from address import clean_address
 from public import Apartment, ApartmentScraper
 
 
@@ -8,10 +9,11 @@ class JSJ(ApartmentScraper):
     A class to scrape apartment data from JSJ Management's website.
     Inherits from the ApartmentScraper class defined in public.py.
     """
+    parse_only = SoupStrainer('script', id='search-form-config')
 
     def process_address(self, address):
         """
-        Process the address string to modify its format.
+        Process the address string to the shared format (see address.py), dropping the unit.
 
         >>> jsj = JSJ('https://jsjmanagement.com/on-campus/listing/', 'JSJ')
         >>> jsj.process_address("123 Main Street")
@@ -23,23 +25,9 @@ class JSJ(ApartmentScraper):
         >>> jsj.process_address("101 Pine Street Apartment 5")
         '101 Pine St'
         >>> jsj.process_address("202 Birch Road")
-        '202 Birch Road'
+        '202 Birch Rd'
         """
-        address_parts = address.split()
-        processed_parts = []
-
-        # Iterate over address parts to process each word
-        for part in address_parts:
-            if part in ['Street', 'St', 'Street-1']:
-                processed_parts.append('St')
-                break
-            elif part in ['Avenue', 'Ave']:
-                processed_parts.append('Ave')
-                break
-            else:
-                processed_parts.append(part)
-
-        return ' '.join(processed_parts)
+        return clean_address(address, building=True)
 
     def parse_data(self):
         """
@@ -52,8 +40,8 @@ class JSJ(ApartmentScraper):
             list[Apartment]: A list of Apartment objects containing the scraped data.
         """
         apartments = []
-        res = self.session.get(self.url).text
-        soup = BeautifulSoup(res, 'html.parser')
+        res = self.fetch_data()
+        soup = self.make_soup(res)
 
         # Extract the JSON data from the webpage's script tag
         script = soup.find('script', type='application/json', id='search-form-config').text
@@ -1,16 +1,19 @@
-from bs4 import BeautifulSoup
+from bs4 import SoupStrainer
+from address import clean_address
 from public import Apartment, ApartmentScraper
 
 
 class JSM(ApartmentScraper):
+    parse_only = SoupStrainer('article', role='article')
+
     def parse_data(self):
         # Set base URL for the JSM website
         self.base_url = 'https://jsmliving.com'
         apartments = []
 
         # Fetch the webpage content
-        page_content = self.session.get(self.url).text
-        soup = BeautifulSoup(page_content, 'html.parser')
+        page_content = self.fetch_data()
+        soup = self.make_soup(page_content)
 
         # Find all articles with the specified role attribute
         articles = soup.find_all('article', role='article')
@@ -24,7 +27,7 @@ class JSM(ApartmentScraper):
 
     def extract_apartment_data(self, article):
         """Extracts apartment data from an article element."""
-        address = article.find('a', hreflang='en').text.strip()
+        address = clean_address(article.find('a', hreflang='en').text)
         link = self.base_url + article.find('a', class_='call-to-action')['href']
 
         rent_text = article.find('div', class_='unit__card-rent').text
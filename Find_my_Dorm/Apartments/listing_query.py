@@ -0,0 +1,193 @@
+import numpy as np
+
+
+class Range:
+    """
+    A range predicate on a numeric column; any bound left as None is open.
+
+    >>> Range(gt=2)
+    Range(gt=2)
+    >>> Range(ge=500, lt=1000)
+    Range(ge=500, lt=1000)
+    """
+
+    def __init__(self, ge=None, gt=None, le=None, lt=None):
+        self.ge = ge
+        self.gt = gt
+        self.le = le
+        self.lt = lt
+
+    @classmethod
+    def of(cls, value):
+        """Build a Range from a query argument: a Range, an inclusive (lo, hi) tuple or a single value."""
+        if isinstance(value, Range):
+            return value
+        if isinstance(value, tuple):
+            lo, hi = value
+            return cls(ge=lo, le=hi)
+        return cls(ge=value, le=value)
+
+    def bounds(self, sorted_values):
+        """Return the (start, stop) slice of ``sorted_values`` that falls in the range."""
+        start, stop = 0, len(sorted_values)
+        if self.ge is not None:
+            start = max(start, np.searchsorted(sorted_values, self.ge, side='left'))
+        if self.gt is not None:
+            start = max(start, np.searchsorted(sorted_values, self.gt, side='right'))
+        if self.le is not None:
+            stop = min(stop, np.searchsorted(sorted_values, self.le, side='right'))
+        if self.lt is not None:
+            stop = min(stop, np.searchsorted(sorted_values, self.lt, side='left'))
+        return start, max(start, stop)
+
+    def mask(self, values):
+        """Return a boolean array telling which of ``values`` fall in the range."""
+        mask = ~np.isnan(values)
+        if self.ge is not None:
+            mask &= values >= self.ge
+        if self.gt is not None:
+            mask &= values > self.gt
+        if self.le is not None:
+            mask &= values <= self.le
+        if self.lt is not None:
+            mask &= values < self.lt
+        return mask
+
+    def __repr__(self):
+        bounds = ', '.join(f'{name}={getattr(self, name)!r}' for name in ('ge', 'gt', 'le', 'lt')
+                           if getattr(self, name) is not None)
+        return f"Range({bounds})"
+
+
+class ListingIndex:
+    """
+    Indexes over the combined listings for fast interactive search.
+
+    Price, Bedroom and Bathroom get sorted indexes, answered with a binary search;
+    agency (Name) and Is_studio get bitmap indexes, one boolean array per value.
+    A query starts from the most selective sorted index and checks the remaining
+    predicates only on the rows that survive, so it does not scan the whole frame.
+
+    Example:
+    ```python
+    index = ListingIndex(All_apt)
+    index.query(bathrooms=Range(gt=2))
+    index.query(price=Range(lt=1000), agency=['MHM', 'JSM'], order_by='Price', k=10)
+    ```
+    """
+
+    RANGE_COLUMNS = {'price': 'Price', 'bedrooms': 'Bedroom', 'bathrooms': 'Bathroom'}
+
+    def __init__(self, df):
+        self.df = df.reset_index(drop=True)
+        self._values = {}
+        self._order = {}
+        self._sorted = {}
+        for column in self.RANGE_COLUMNS.values():
+            values = np.asarray(self.df[column], dtype=float)
+            # NaN never satisfies a range, so it is left out of the sorted index
+            order = np.argsort(values, kind='stable')
+            order = order[~np.isnan(values[order])]
+            self._values[column] = values
+            self._order[column] = order
+            self._sorted[column] = values[order]
+        self._agency = {name: np.asarray(self.df['Name'] == name) for name in self.df['Name'].dropna().unique()}
+        # A listing whose studio flag is unknown (None, NaN or NA) matches neither value
+        self._studio = {flag: np.asarray(self.df['Is_studio'].eq(flag).fillna(False), dtype=bool)
+                        for flag in (True, False)}
+
+    def __len__(self):
+        return len(self.df)
+
+    def query_ids(self, price=None, bedrooms=None, bathrooms=None, agency=None, is_studio=None,
+                  order_by=None, ascending=True, k=None):
+        """
+        Return the row positions matching every given predicate.
+
+        Parameters:
+        - price, bedrooms, bathrooms (Range, tuple or number, optional): Range predicates;
+          a tuple is an inclusive (lo, hi) range with None for an open end, a number an exact match.
+        - agency (str or list of str, optional): Keep listings of these agencies only.
+        - is_studio (bool, optional): Keep only studios (True) or non-studios (False).
+        - order_by (str, optional): 'Price', 'Bedroom' or 'Bathroom' to order the result by.
+        - ascending (bool, optional): Sort direction for order_by (default is True).
+        - k (int, optional): Return only the first k rows of the ordering.
+
+        Returns:
+        - numpy.ndarray: Positions into the indexed DataFrame.
+        """
+        given = {'price': price, 'bedrooms': bedrooms, 'bathrooms': bathrooms}
+        ranges = [(column, Range.of(given[name])) for name, column in self.RANGE_COLUMNS.items()
+                  if given[name] is not None]
+
+        bitmap = None
+        if agency is not None:
+            names = [agency] if isinstance(agency, str) else agency
+            bitmap = np.zeros(len(self.df), dtype=bool)
+            for name in names:
+                if name in self._agency:
+                    bitmap |= self._agency[name]
+        if is_studio is not None:
+            studio = self._studio[bool(is_studio)]
+            bitmap = studio if bitmap is None else bitmap & studio
+
+        if ranges:
+            # Start from the narrowest slice of a sorted index
+            slices = [(column, rng.bounds(self._sorted[column])) for column, rng in ranges]
+            column, (start, stop) = min(slices, key=lambda item: item[1][1] - item[1][0])
+            ids = self._order[column][start:stop]
+            for other, rng in ranges:
+                if other != column:
+                    ids = ids[rng.mask(self._values[other][ids])]
+            if bitmap is not None:
+                ids = ids[bitmap[ids]]
+            ids = np.sort(ids)
+        elif bitmap is not None:
+            ids = np.flatnonzero(bitmap)
+        else:
+            ids = np.arange(len(self.df))
+
+        if order_by is not None:
+            if order_by not in self._values:
+                raise ValueError(f"Can only order by one of {list(self._values)}, not {order_by!r}")
+            keys = self._values[order_by][ids]
+            if not ascending:
+                keys = -keys
+            if k is not None and k < len(ids):
+                # Only the k best rows need a full sort
+                top = np.argpartition(keys, k - 1)[:k]
+                ids, keys = ids[top], keys[top]
+            ids = ids[np.argsort(keys, kind='stable')]
+        if k is not None:
+            ids = ids[:k]
+        return ids
+
+    def query(self, **predicates):
+        """
+        Return the listings matching the predicates as a DataFrame, see query_ids.
+
+        >>> import pandas as pd
+        >>> df = pd.DataFrame([['1 Main St', 900.0, 1, 1.0, 'a', '2024-08', 'MHM', True],
+        ...                    ['2 Main St', 1500.0, 3, 2.5, 'b', '2024-08', 'JSM', False],
+        ...                    ['3 Main St', 1200.0, 2, 2.0, 'c', '2024-08', 'JSM', False],
+        ...                    ['4 Main St', float('nan'), 4, 3.0, 'd', False, 'MHM', False],
+        ...                    ['5 Main St', 700.0, 1, 1.0, 'e', '2024-08', 'Ugroup', None]],
+        ...                   columns=['Address', 'Price', 'Bedroom', 'Bathroom', 'Link', 'Availability', 'Name', 'Is_studio'])
+        >>> index = ListingIndex(df)
+        >>> index.query(bathrooms=Range(gt=2))['Address'].tolist()
+        ['2 Main St', '4 Main St']
+        >>> index.query(price=Range(lt=1000))['Address'].tolist()
+        ['1 Main St', '5 Main St']
+        >>> index.query(is_studio=True)['Address'].tolist()
+        ['1 Main St']
+        >>> index.query(price=(1000, None), agency='JSM', order_by='Price', ascending=False, k=1)['Address'].tolist()
+        ['2 Main St']
+        >>> index.query(is_studio=False, bedrooms=(2, 4))['Address'].tolist()
+        ['2 Main St', '3 Main St', '4 Main St']
+        """
+        return self.df.iloc[self.query_ids(**predicates)]
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,164 @@
+import math
+import os
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from http_cache import CACHE_DIR
+from public import Apartment
+
+# Agency and availability only take a handful of distinct values, so they are
+# dictionary-encoded; Bedroom is nullable because Ugroup does not always publish it
+SCHEMA = pa.schema([
+    ('Address', pa.string()),
+    ('Price', pa.float64()),
+    ('Bedroom', pa.int64()),
+    ('Bathroom', pa.float64()),
+    ('Link', pa.string()),
+    ('Availability', pa.dictionary(pa.int32(), pa.string())),
+    ('Name', pa.dictionary(pa.int32(), pa.string())),
+    ('Is_studio', pa.bool_()),
+])
+# Snapshots kept on disk; older ones are deleted after each save (None keeps them all)
+KEEP_SNAPSHOTS = 20
+
+
+def _missing(value):
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def to_table(listings):
+    """
+    Convert the combined listings (a DataFrame, Apartment objects or rows) to an Arrow table.
+
+    Availability is stored as text, so MHM's ``False`` (leased) becomes 'False'.
+
+    >>> table = to_table([['1 Main St', 900.0, 1, 1.0, 'http://a', False, 'MHM', True],
+    ...                   ['104 E Armory', 1100.0, float('nan'), 2.0, 'http://b', 'august 2024', 'Ugroup', False]])
+    >>> table.column('Bedroom').to_pylist(), table.column('Availability').to_pylist()
+    ([1, None], ['False', 'august 2024'])
+    """
+    if isinstance(listings, pd.DataFrame):
+        rows = listings[Apartment.COLUMNS].values.tolist()
+    else:
+        rows = [apt.to_row() if isinstance(apt, Apartment) else apt for apt in listings]
+    columns = list(zip(*rows)) if rows else [()] * len(Apartment.COLUMNS)
+    address, price, bedroom, bathroom, link, availability, name, is_studio = columns
+    arrays = [
+        pa.array([None if _missing(v) else str(v) for v in address], pa.string()),
+        pa.array([None if _missing(v) else float(v) for v in price], pa.float64()),
+        pa.array([None if _missing(v) else int(v) for v in bedroom], pa.int64()),
+        pa.array([None if _missing(v) else float(v) for v in bathroom], pa.float64()),
+        pa.array([None if _missing(v) else str(v) for v in link], pa.string()),
+        pa.array([None if _missing(v) else str(v) for v in availability], pa.string()).dictionary_encode(),
+        pa.array([None if _missing(v) else str(v) for v in name], pa.string()).dictionary_encode(),
+        pa.array([None if _missing(v) else bool(v) for v in is_studio], pa.bool_()),
+    ]
+    return pa.Table.from_arrays(arrays, schema=SCHEMA)
+
+
+class ListingStore:
+    """
+    Keeps snapshots of the combined listings on disk as Arrow IPC files.
+
+    Snapshots are written uncompressed so they can be memory-mapped: loading the
+    latest one does not copy the column data, which makes it a matter of
+    milliseconds instead of a full re-scrape.
+
+    Snapshot names carry their UTC write time, so they sort in the order they were
+    written regardless of the machine's time zone or daylight saving time.
+
+    Parameters:
+    - directory (str, optional): Where the snapshots are stored.
+    - keep (int, optional): How many of the newest snapshots to keep (default is
+      KEEP_SNAPSHOTS, None keeps them all).
+    """
+
+    def __init__(self, directory=None, keep=KEEP_SNAPSHOTS):
+        self.directory = directory or os.path.join(CACHE_DIR, 'listings')
+        self.keep = keep
+        os.makedirs(self.directory, exist_ok=True)
+
+    def snapshots(self):
+        """Return the paths of all snapshots, oldest first."""
+        names = sorted(name for name in os.listdir(self.directory) if name.endswith('.arrow'))
+        return [os.path.join(self.directory, name) for name in names]
+
+    def save(self, listings):
+        """
+        Write a new snapshot of ``listings`` and return its path.
+
+        Parameters:
+        - listings (pandas.DataFrame or list): The combined listings, as a DataFrame,
+          Apartment objects or rows in the notebook column order.
+
+        Returns:
+        - str: The path of the snapshot file.
+
+        >>> import tempfile
+        >>> store = ListingStore(tempfile.mkdtemp(), keep=2)
+        >>> paths = [store.save([['1 Main St', 900.0, 1, 1.0, 'http://a', False, 'MHM', True]]) for _ in range(3)]
+        >>> store.snapshots() == paths[1:]
+        True
+        """
+        table = to_table(listings)
+        # Seconds and nanoseconds come from one clock read, so names sort in the order they were written
+        ns = time.time_ns()
+        stamp = time.strftime('%Y%m%dT%H%M%SZ', time.gmtime(ns // 10**9))
+        path = os.path.join(self.directory, f'listings-{stamp}-{ns % 10**9:09d}.arrow')
+        tmp_path = path + '.tmp'
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+        self.prune()
+        return path
+
+    def prune(self):
+        """Delete all but the ``keep`` newest snapshots and return the paths deleted."""
+        if self.keep is None:
+            return []
+        snapshots = self.snapshots()
+        old = snapshots[:max(len(snapshots) - self.keep, 0)]
+        for path in old:
+            try:
+                os.remove(path)
+            except OSError:
+                # Still memory-mapped somewhere (Windows does not delete open files); a later save retries
+                pass
+        return old
+
+    def load_table(self, path=None):
+        """Memory-map a snapshot (the latest by default) and return it as an Arrow table."""
+        path = path or self.latest()
+        if path is None:
+            raise FileNotFoundError(f"No listing snapshot in {self.directory}")
+        return pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+
+    def load(self, path=None, columns=None):
+        """
+        Load a snapshot (the latest by default) as a DataFrame.
+
+        The dictionary-encoded Availability and Name columns come back as pandas categoricals.
+        """
+        table = self.load_table(path)
+        if columns is not None:
+            table = table.select(columns)
+        return table.to_pandas()
+
+    def latest(self):
+        """Return the path of the most recent snapshot, or None if there is none."""
+        snapshots = self.snapshots()
+        return snapshots[-1] if snapshots else None
+
+    def export_parquet(self, path, snapshot=None):
+        """Write a snapshot (the latest by default) to a Parquet file, e.g. for sharing."""
+        pq.write_table(self.load_table(snapshot), path)
+        return path
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,252 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import MHM
+import Ugroup
+import Wampler
+from bailey import Bailey
+from green_street import Green_Street
+from incremental import diff_listings
+from jsj import JSJ
+from jsm import JSM
+
+
+class Source:
+    """
+    One agency to scrape: either a function-style scraper (``get_MHM`` and friends)
+    or an ApartmentScraper subclass.
+
+    Sources marked ``combined`` are merged the way ``combine_apartment_lists`` does,
+    keeping one record per address across all combined sources. Sources marked
+    ``incremental`` accept a FingerprintStore and skip unchanged detail pages.
+    """
+
+    def __init__(self, name, url, scrape=None, scraper_class=None, combined=False, incremental=False):
+        self.name = name
+        self.url = url
+        self.scrape = scrape
+        self.scraper_class = scraper_class
+        self.combined = combined
+        self.incremental = incremental
+
+    def run(self, store=None, errors=None):
+        """
+        Scrape the source and return its listings as rows in the notebook column order.
+
+        Detail pages of incremental sources that failed are appended to ``errors``
+        as (link, exception) pairs.
+        """
+        if self.incremental:
+            return self.scrape(self.url, errors=errors, store=store)
+        if self.scraper_class is not None:
+            scraper = self.scraper_class(self.url, self.name)
+            return [apt.to_row() for apt in scraper.parse_data()]
+        return self.scrape(self.url)
+
+    def __repr__(self):
+        return f"<Source {self.name} {self.url}>"
+
+
+class SourceResult:
+    """
+    Outcome of scraping one source: its rows, how long it took, the error that stopped
+    it, if any, and the (link, exception) pairs of the detail pages that failed.
+    """
+
+    def __init__(self, source, rows, seconds, error=None, page_errors=None):
+        self.source = source
+        self.rows = rows
+        self.seconds = seconds
+        self.error = error
+        self.page_errors = page_errors if page_errors is not None else []
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    @property
+    def complete(self):
+        """True if the source ran and every one of its detail pages was read."""
+        return self.ok and not self.page_errors
+
+    def __repr__(self):
+        """
+        >>> SourceResult(Source('A', 'http://a.example'), [['1 Main St']], 0.5, page_errors=[('http://a.example/2', OSError())])
+        <SourceResult A 1 rows 0.50s partial: 1 pages failed>
+        """
+        if not self.ok:
+            status = f'failed: {self.error!r}'
+        elif self.page_errors:
+            status = f'partial: {len(self.page_errors)} pages failed'
+        else:
+            status = 'ok'
+        return f"<SourceResult {self.source.name} {len(self.rows)} rows {self.seconds:.2f}s {status}>"
+
+
+class ScrapeReport:
+    """
+    The merged listings of a full refresh plus one SourceResult per source.
+
+    For an incremental refresh ``delta`` holds the ListingDelta against the previous run.
+    """
+
+    def __init__(self, rows, results, delta=None):
+        self.rows = rows
+        self.results = results
+        self.delta = delta
+
+    @property
+    def failures(self):
+        return [result for result in self.results if not result.ok]
+
+    @property
+    def incomplete(self):
+        """The sources that ran but lost some of their detail pages, see SourceResult.page_errors."""
+        return [result for result in self.results if result.ok and not result.complete]
+
+    def timings(self):
+        """Return a dict of source name to seconds spent scraping it."""
+        return {result.source.name: result.seconds for result in self.results}
+
+    def __repr__(self):
+        return (f"<ScrapeReport {len(self.rows)} rows, {len(self.failures)} of {len(self.results)} sources failed, "
+                f"{len(self.incomplete)} incomplete>")
+
+
+SOURCES = [
+    Source('MHM', 'https://www.mhmproperties.com/apartments/?_sft_types=apartments', scrape=MHM.get_MHM),
+    Source('Wampler', 'https://wamplerapartments.com/our-properties/', scrape=Wampler.get_wampler, incremental=True),
+    Source('Ugroup', 'https://ugroupcu.com/building-list/', scrape=Ugroup.get_ugroup, incremental=True),
+    Source('Bailey', 'http://baileyapartments.com/amenities/', scraper_class=Bailey, combined=True),
+    Source('Green Street', 'https://www.greenstrealty.com/modules/extended/propertySearch',
+           scraper_class=Green_Street, combined=True),
+    Source('JSJ', 'https://jsjmanagement.com/on-campus/listing/', scraper_class=JSJ, combined=True),
+    Source('JSM', 'https://jsmliving.com/search-available-units', scraper_class=JSM, combined=True),
+]
+
+
+def _run_source(source, store=None):
+    start = time.perf_counter()
+    page_errors = []
+    try:
+        rows = source.run(store, page_errors)
+        error = None
+    except Exception as e:
+        # One broken agency site must not take the whole refresh down with it
+        rows, error = [], e
+    return SourceResult(source, rows, time.perf_counter() - start, error, page_errors)
+
+
+def merge_results(results):
+    """
+    Merge per-source rows into one list, in source order.
+
+    Rows of combined sources are de-duplicated by address (the last one wins, at
+    the position of the first), matching ``combine_apartment_lists``.
+
+    >>> a = Source('A', 'http://a.example')
+    >>> b = Source('B', 'http://b.example', combined=True)
+    >>> c = Source('C', 'http://c.example', combined=True)
+    >>> merge_results([SourceResult(a, [['1 Main St', 900]], 0.1),
+    ...                SourceResult(b, [['2 Green St', 1000]], 0.2),
+    ...                SourceResult(c, [['2 Green St', 1100], ['3 Oak St', 800]], 0.3)])
+    [['1 Main St', 900], ['2 Green St', 1100], ['3 Oak St', 800]]
+    """
+    rows = []
+    combined = {}
+    for result in results:
+        if result.source.combined:
+            for row in result.rows:
+                combined[row[0]] = row
+        else:
+            rows.extend(result.rows)
+    rows.extend(combined.values())
+    return rows
+
+
+def scrape_all(sources=None, max_workers=None, store=None):
+    """
+    Scrape every source at the same time and merge the results.
+
+    Each source runs in its own worker thread; requests to any one host are still
+    capped by ``fetching.default_limiter``. A source that raises is reported in its
+    SourceResult and contributes no rows, while the others complete normally. A source
+    that lost some detail pages is listed in ``report.incomplete``, with the failed
+    links in its ``page_errors``.
+
+    With a FingerprintStore the refresh is incremental: Wampler and Ugroup revalidate
+    every detail page but only parse the ones that changed, and the report carries the
+    delta of added, removed and changed listings since the previous run. The snapshot
+    of a failed source is kept, so a failure does not show up as mass removals; likewise
+    a detail page that failed keeps its rows from the previous run and is only listed
+    in its SourceResult's ``page_errors``.
+
+    Parameters:
+    - sources (list of Source, optional): The sources to scrape (default is SOURCES).
+    - max_workers (int, optional): Number of worker threads (default is one per source).
+    - store (incremental.FingerprintStore, optional): Enables the incremental mode.
+
+    Returns:
+    - ScrapeReport: The merged rows and the per-source timing and failure status.
+
+    Example:
+    ```python
+    report = scrape_all()
+    All_apt = apartments_to_frame(report.rows)
+    print(report.timings(), report.failures, report.incomplete)
+
+    # Daily refresh: only re-scrape what changed
+    report = scrape_all(store=FingerprintStore())
+    print(report.delta.added, report.delta.removed, report.delta.changed)
+    ```
+
+    A detail page answering 500 on the second run leaves the delta empty:
+
+    >>> import tempfile, requests, http_cache
+    >>> from fetching import crawl_details
+    >>> from incremental import FingerprintStore
+    >>> class Site(requests.Session):
+    ...     status = {}
+    ...     def get(self, url, **kwargs):
+    ...         response = requests.Response()
+    ...         response.url, response.status_code, response._content = url, self.status.get(url, 200), url.encode()
+    ...         return response
+    >>> links = ['http://a.example/1', 'http://a.example/2']
+    >>> parse = lambda html, link: [[f'{link[-1]} Main St', 900.0, 1, 1.0, link, '2024-08', 'A', False]]
+    >>> a = Source('A', 'http://a.example', incremental=True,
+    ...            scrape=lambda url, errors, store: crawl_details(Site(), links, parse, errors=errors, store=store))
+    >>> store = FingerprintStore(tempfile.mkdtemp() + '/fingerprints.json')
+    >>> http_cache.set_default_cache(False)
+    >>> scrape_all([a], store=store).delta
+    <ListingDelta +2 -0 ~0>
+    >>> Site.status['http://a.example/2'] = 500
+    >>> report = scrape_all([a], store=store)
+    >>> report.delta, len(report.rows), [link for link, e in report.results[0].page_errors]
+    (<ListingDelta +0 -0 ~0>, 2, ['http://a.example/2'])
+    >>> http_cache.set_default_cache(None)
+    """
+    sources = SOURCES if sources is None else sources
+    if not sources:
+        return ScrapeReport([], [])
+    with ThreadPoolExecutor(max_workers=max_workers or len(sources)) as pool:
+        results = list(pool.map(lambda source: _run_source(source, store), sources))
+    rows = merge_results(results)
+    if store is None:
+        return ScrapeReport(rows, results)
+
+    old_rows, new_rows = [], []
+    for result in results:
+        previous = store.snapshot(result.source.name)
+        old_rows.extend(previous)
+        if result.ok:
+            store.set_snapshot(result.source.name, result.rows)
+            new_rows.extend(result.rows)
+        else:
+            new_rows.extend(previous)
+    store.save()
+    return ScrapeReport(rows, results, diff_listings(old_rows, new_rows))
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
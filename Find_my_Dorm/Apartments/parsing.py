@@ -0,0 +1,56 @@
+import re
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+# BeautifulSoup's built-in parser. lxml is several times faster, but it repairs broken
+# markup differently and can build a different tree, so a scraper only opts into it
+# (PARSER = 'lxml') after ``benchmarks/bench_parsing.py --parity`` shows the same rows.
+DEFAULT_PARSER = 'html.parser'
+try:
+    import lxml  # noqa: F401
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+# Tree builders BeautifulSoup can use, fastest first
+PARSERS = ['lxml', 'html.parser']
+
+
+def has_class(*names):
+    """
+    Return a ``class_`` matcher for SoupStrainer that accepts elements carrying any of ``names``.
+
+    A strainer sees the raw class attribute while the page is being parsed, so a plain
+    string would miss elements that carry more than one class.
+
+    >>> html = '<div class="tab-content_in_wrapp tab-cntnt_wrap_btm">a</div><div class="tab-content_in_rgt">b</div>'
+    >>> make_soup(html, 'html.parser', SoupStrainer('div', class_=has_class('tab-content_in_wrapp'))).text
+    'a'
+    """
+    return re.compile(r'(^|\s)(' + '|'.join(re.escape(name) for name in names) + r')(\s|$)')
+
+
+def make_soup(html, parser=None, parse_only=None):
+    """
+    Build a BeautifulSoup tree with the chosen backend, optionally for part of the page only.
+
+    Parameters:
+    - html (str): The page content.
+    - parser (str, optional): 'lxml' or 'html.parser' (default is DEFAULT_PARSER).
+    - parse_only (SoupStrainer, optional): Only elements matching the strainer (and their
+      children) are built into the tree; the rest of the page is skipped.
+
+    Returns:
+    - BeautifulSoup: The parsed tree.
+
+    >>> html = '<div><table id="tablepress-2"><tr><td>1 Bedroom</td></tr></table><p>footer</p></div>'
+    >>> soup = make_soup(html, 'html.parser', SoupStrainer('table', id='tablepress-2'))
+    >>> soup.find('td').text, soup.find('p')
+    ('1 Bedroom', None)
+    """
+    return BeautifulSoup(html, parser or DEFAULT_PARSER, parse_only=parse_only)
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -1,7 +1,32 @@
-import requests
+import http_cache
+import parsing
+import transport
+
+
+def _number(kind, value):
+    # Scrapers sometimes hand numbers over as text ('1200', ' 2 '); anything that is
+    # not a number (e.g. Ugroup's 'Not published') is kept as it is
+    try:
+        return kind(float(value)) if kind is int else kind(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def _flag(value):
+    return value.strip() == 'True' if isinstance(value, str) else bool(value)
+
+
+def _text(value):
+    return value.strip() if isinstance(value, str) else value
 
 
 class Apartment:
+    # Column names of the combined listings DataFrame, in the order of to_row()
+    COLUMNS = ['Address', 'Price', 'Bedroom', 'Bathroom', 'Link', 'Availability', 'Name', 'Is_studio']
+
+    # Scrapers create thousands of these, slots keep them small and fast to build
+    __slots__ = ('address', 'price', 'bedrooms', 'bathrooms', 'link', 'available_date', 'agency_name', 'is_studio')
+
     def __init__(self, address, price, bedrooms, bathrooms, link, available_date, agency_name, is_studio):
         self.address = address
         self.price = price
@@ -18,14 +43,51 @@ class Apartment:
 
     __repr__ = __str__
 
+    def to_row(self):
+        """
+        Return the apartment as a row in the order of Apartment.COLUMNS.
+
+        The price and bathrooms come out as floats, the bedrooms as an int and the
+        studio flag as a bool, whatever form the scraper stored them in.
+
+        >>> Apartment('101 Green St', 1200.0, 2, 1.0, 'http://a', '2024-08-01', 'JSM', False).to_row()
+        ['101 Green St', 1200.0, 2, 1.0, 'http://a', '2024-08-01', 'JSM', False]
+        >>> Apartment('101 Green St', '1200', '2', '1', 'http://a', ' 2024-08-01', ' JSM', 'False').to_row()
+        ['101 Green St', 1200.0, 2, 1.0, 'http://a', '2024-08-01', 'JSM', False]
+        """
+        return [self.address, _number(float, self.price), _number(int, self.bedrooms), _number(float, self.bathrooms),
+                self.link, _text(self.available_date), _text(self.agency_name), _flag(self.is_studio)]
+
+
+def apartments_to_frame(apartments):
+    """
+    Build the combined listings DataFrame straight from Apartment objects or rows.
+
+    >>> apartments_to_frame([Apartment('101 Green St', 1200.0, 2, 1.0, 'http://a', '2024-08-01', 'JSM', False),
+    ...                      ['1 Main St', 900.0, 1, 1.0, 'http://b', '2024-08', 'MHM', True]])['Name'].tolist()
+    ['JSM', 'MHM']
+    """
+    import pandas as pd
+    rows = [apt.to_row() if isinstance(apt, Apartment) else apt for apt in apartments]
+    return pd.DataFrame(rows, columns=Apartment.COLUMNS)
+
 
 class ApartmentScraper:
+    # BeautifulSoup tree builder, None uses parsing.DEFAULT_PARSER (see parsing.py)
+    parser = None
+    # SoupStrainer limiting the parse to the elements parse_data needs, None parses the whole page
+    parse_only = None
+
     def __init__(self, url, agency_name):
         self.url = url
         self.agency_name = agency_name
-        self.session = requests.Session()
-        self.session.headers.update({'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36'})
+        # Every agency has its own session over the shared connection pools, see transport.py
+        self.session = transport.get_session(agency_name)
 
     def fetch_data(self):
-        response = self.session.get(self.url)
-        return response.text
\ No newline at end of file
+        # GET requests go through the shared on-disk cache, see http_cache.py
+        response = http_cache.fetch(self.session, self.url)
+        return response.text
+
+    def make_soup(self, html):
+        return parsing.make_soup(html, self.parser, self.parse_only)
\ No newline at end of file
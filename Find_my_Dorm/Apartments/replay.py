@@ -0,0 +1,231 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# Query parameters that must never end up in a fixture (the Google API key and its signature)
+SECRET_PARAMS = {'key', 'signature', 'client'}
+# The body is stored decoded, so these headers no longer describe it
+DROPPED_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'set-cookie'}
+
+
+class FixtureMissing(requests.ConnectionError):
+    """Raised in replay mode for a request that was never recorded."""
+
+
+def canonical_url(url):
+    """
+    Return ``url`` with its query sorted and secrets removed, so it can key a fixture.
+
+    >>> canonical_url('https://maps.googleapis.com/maps/api/place/textsearch/json?query=501+E+Healey&key=SECRET')
+    'https://maps.googleapis.com/maps/api/place/textsearch/json?query=501+E+Healey'
+    """
+    parts = urlsplit(url)
+    query = sorted((name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+                   if name not in SECRET_PARAMS)
+    return urlunsplit((parts.scheme, parts.netloc.lower(), parts.path, urlencode(query), ''))
+
+
+def request_key(method, url, body=None):
+    """Return the fixture key of a request: a hash of its method, canonical URL and body."""
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    digest = hashlib.sha1(f"{method.upper()} {canonical_url(url)}\n".encode('utf-8'))
+    digest.update(body or b'')
+    return digest.hexdigest()
+
+
+class FixtureStore:
+    """
+    A directory of recorded responses, one gzip-compressed JSON file per request.
+
+    The body is kept decoded (as latin-1 text, which maps bytes one to one) together
+    with the status, headers and the time the real request took.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.json.gz')
+
+    def __contains__(self, key):
+        return os.path.exists(self._path(key))
+
+    def __len__(self):
+        return sum(name.endswith('.json.gz') for name in os.listdir(self.directory))
+
+    def get(self, key):
+        """Return the recorded fixture for ``key``, or None."""
+        try:
+            with gzip.open(self._path(key), 'rt', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, response, elapsed):
+        """Record a requests.Response, which took ``elapsed`` seconds, under ``key``."""
+        fixture = {
+            'method': response.request.method,
+            'url': canonical_url(response.request.url),
+            'status': response.status_code,
+            'reason': response.reason,
+            'headers': {name: value for name, value in response.headers.items()
+                        if name.lower() not in DROPPED_HEADERS},
+            'body': response.content.decode('latin-1'),
+            'elapsed': elapsed,
+        }
+        tmp_path = self._path(key) + '.tmp'
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump(fixture, f)
+        os.replace(tmp_path, self._path(key))
+
+
+def _body(request):
+    body = request.body
+    return body.read() if hasattr(body, 'read') else body
+
+
+class RecordingAdapter(BaseAdapter):
+    """Sends requests through ``adapter`` (the session's own) and records every response."""
+
+    def __init__(self, store, adapter=None):
+        super().__init__()
+        self.store = store
+        self.adapter = adapter or HTTPAdapter()
+        self.recorded = 0
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        began = time.perf_counter()
+        response = self.adapter.send(request, **kwargs)
+        # Reading the content here also releases the connection back to the pool
+        response.content
+        elapsed = time.perf_counter() - began
+        self.store.put(request_key(request.method, request.url, _body(request)), response, elapsed)
+        with self._lock:
+            self.recorded += 1
+        return response
+
+    def close(self):
+        self.adapter.close()
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Answers requests from recorded fixtures without touching the network.
+
+    Parameters:
+    - store (FixtureStore): The recorded responses.
+    - latency (float, optional): Seconds every response takes; None replays the time the
+      real request took, 0 answers at once (default is None).
+    - latency_scale (float, optional): Multiplies the recorded time when latency is None.
+
+    >>> import tempfile
+    >>> session = requests.Session()
+    >>> adapter = install(session, tempfile.mkdtemp(), mode='replay', latency=0)
+    >>> try:
+    ...     session.get('https://ugroupcu.com/building-list/')
+    ... except FixtureMissing:
+    ...     print('not recorded')
+    not recorded
+    """
+
+    def __init__(self, store, latency=None, latency_scale=1.0):
+        super().__init__()
+        self.store = store
+        self.latency = latency
+        self.latency_scale = latency_scale
+        self.replayed = 0
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        fixture = self.store.get(request_key(request.method, request.url, _body(request)))
+        if fixture is None:
+            raise FixtureMissing(f"No fixture for {request.method} {canonical_url(request.url)}", request=request)
+        delay = fixture['elapsed'] * self.latency_scale if self.latency is None else self.latency
+        if delay:
+            time.sleep(delay)
+        response = requests.Response()
+        response.status_code = fixture['status']
+        response.reason = fixture['reason']
+        response.headers = CaseInsensitiveDict(fixture['headers'])
+        response._content = fixture['body'].encode('latin-1')
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        with self._lock:
+            self.replayed += 1
+        return response
+
+    def close(self):
+        pass
+
+
+def install(session, directory, mode='replay', latency=None, latency_scale=1.0):
+    """
+    Mount a record or replay adapter on ``session`` for http:// and https://.
+
+    Parameters:
+    - session (requests.Session): E.g. ``transport.get_session('JSM')`` or a googlemaps
+      client's ``client.session``.
+    - directory (str): The fixture corpus.
+    - mode (str, optional): 'record' to capture real responses, 'replay' to serve them offline.
+    - latency, latency_scale (optional): Simulated latency when replaying, see ReplayAdapter.
+
+    Returns:
+    - The mounted adapter, whose ``recorded`` / ``replayed`` count the requests.
+    """
+    adapter = _make_adapter(directory, mode, session.get_adapter('https://'), latency, latency_scale)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return adapter
+
+
+def _make_adapter(directory, mode, adapter, latency, latency_scale):
+    store = FixtureStore(directory)
+    if mode == 'record':
+        return RecordingAdapter(store, adapter)
+    if mode == 'replay':
+        return ReplayAdapter(store, latency, latency_scale)
+    raise ValueError(f"mode must be 'record' or 'replay', not {mode!r}")
+
+
+def use_fixtures(directory, mode='replay', latency=None, latency_scale=1.0, gmaps=None):
+    """
+    Run the whole pipeline against a fixture corpus: every scraper session (through
+    their shared adapter, see transport.mount) and, if given, a googlemaps client.
+
+    The on-disk HTTP cache is switched off, so every request reaches the fixtures.
+
+    Example:
+    ```python
+    use_fixtures('fixtures', mode='record', gmaps=get_gmaps())   # once, online
+    use_fixtures('fixtures', mode='replay', gmaps=get_gmaps())   # offline, e.g. in CI
+    report = orchestrator.scrape_all()
+    ```
+    """
+    import http_cache
+    import transport
+    http_cache.set_default_cache(False)
+    adapter = _make_adapter(directory, mode, transport.shared_adapter(), latency, latency_scale)
+    transport.mount(adapter)
+    adapters = [adapter]
+    if gmaps is not None:
+        adapters.append(install(gmaps.session, directory, mode, latency, latency_scale))
+    return adapters
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -12,7 +12,7 @@ def combine_apartment_lists(scrapers):
         scrapers (list): A list of scraper instances, each having a 'parse_data' method.
 
     Returns:
-        list[str]: A combined list of formatted string representations of Apartment objects from all scrapers,
+        list[Apartment]: A combined list of Apartment objects from all scrapers,
                    with duplicates removed based on apartment name.
     """
     combined_apartments = {}
@@ -21,10 +21,8 @@ def combine_apartment_lists(scrapers):
         if hasattr(scraper, 'parse_data') and callable(getattr(scraper, 'parse_data')):
             apartments = scraper.parse_data()
             for apt in apartments:
-                # Format each Apartment object as a string
-                formatted_apt = f"{apt.address}, {apt.price}, {apt.bedrooms}, {apt.bathrooms}, {apt.link}, {apt.available_date}, {apt.agency_name}, {apt.is_studio}"
                 # Use apartment address as the key to avoid duplicates
-                combined_apartments[apt.address] = formatted_apt
+                combined_apartments[apt.address] = apt
         else:
             print(f"Scraper {type(scraper).__name__} does not have a parse_data method.")
 
@@ -74,17 +72,6 @@ def get_some_apt():
 
     # Combine listings
     combined_list = combine_apartment_lists(scrapers_to_combine)
-    some_apartments = []
-    for data in combined_list:
-        data = data.split(',')
-        address = data[0]
-        price = float(data[1].strip(''))
-        bedroom = int(data[2].strip(''))
-        bathroom = float(data[3].strip(''))
-        link = data[4]
-        availability = data[5].strip(' ')
-        name = data[6].strip(' ')
-        is_studio = eval(data[-1])
-        some_apartments.append([address, price, bedroom, bathroom, link, availability, name, is_studio])
-    return some_apartments
+    # The records are already structured, no need to go through text
+    return [apt.to_row() for apt in combined_list]
 
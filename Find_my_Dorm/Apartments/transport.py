@@ -0,0 +1,125 @@
+import threading
+
+import requests
+from requests.cookies import RequestsCookieJar
+
+from fetching import LimitedAdapter, default_limiter
+
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36'
+# (connect, read) timeouts in seconds for every request that does not set its own
+DEFAULT_TIMEOUT = (5, 30)
+# Number of hosts whose connection pools are kept alive at the same time
+MAX_HOSTS = 16
+
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+
+class TransportAdapter(LimitedAdapter):
+    """
+    The adapter behind the shared session: keep-alive connection pools capped at
+    ``max_per_host`` connections per host, and a default connect/read timeout.
+    """
+
+    def __init__(self, limiter, timeout=DEFAULT_TIMEOUT, max_hosts=MAX_HOSTS):
+        self.timeout = timeout
+        super().__init__(limiter, pool_connections=max_hosts, pool_maxsize=limiter.max_per_host, pool_block=True)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().send(request, **kwargs)
+
+
+class ThreadSafeCookieJar(RequestsCookieJar):
+    """
+    A cookie jar that can be read while another thread writes to it.
+
+    ``http.cookiejar.CookieJar`` takes its lock to add and extract cookies, but not to
+    iterate, which requests does for every request it prepares; iterating here copies
+    the cookies under the lock first.
+    """
+
+    def __iter__(self):
+        with self._cookies_lock:
+            return iter(list(super().__iter__()))
+
+
+def make_session(limiter=None, timeout=DEFAULT_TIMEOUT, compression=True, adapter=None):
+    """
+    Build a session with the transport adapter mounted.
+
+    Parameters:
+    - limiter (fetching.HostLimiter, optional): The per-host limit (default is fetching.default_limiter).
+    - timeout (tuple, optional): Default (connect, read) timeout in seconds.
+    - compression (bool, optional): Ask for gzip/deflate (and brotli when installed) responses.
+    - adapter (requests.adapters.BaseAdapter, optional): Mount this adapter, e.g. one shared
+      by many sessions, instead of a new TransportAdapter (limiter and timeout are then unused).
+
+    Returns:
+    - requests.Session: The new session, with its own cookie jar.
+
+    >>> session = make_session(timeout=(1, 2))
+    >>> session.get_adapter('https://ugroupcu.com/').timeout
+    (1, 2)
+    """
+    session = requests.Session()
+    session.cookies = ThreadSafeCookieJar()
+    if adapter is None:
+        adapter = TransportAdapter(limiter or default_limiter, timeout=timeout)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({'User-Agent': USER_AGENT})
+    session.headers['Accept-Encoding'] = ACCEPT_ENCODING if compression else 'identity'
+    return session
+
+
+_adapter = None
+_sessions = {}
+_session_lock = threading.RLock()
+
+
+def shared_adapter():
+    """Return the adapter, and so the connection pools, behind every session of get_session."""
+    global _adapter
+    with _session_lock:
+        if _adapter is None:
+            _adapter = TransportAdapter(default_limiter)
+        return _adapter
+
+
+def mount(adapter):
+    """Send the requests of every session of get_session, now and later, through ``adapter``."""
+    global _adapter
+    with _session_lock:
+        _adapter = adapter
+        for session in _sessions.values():
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+
+
+def get_session(agency=None):
+    """
+    Return the session of ``agency``, creating it on first use.
+
+    Every agency gets its own session and cookie jar, so one site's cookies never
+    reach another, while all of them share one adapter and its connection pools.
+
+    >>> get_session('JSM') is get_session('JSM'), get_session('JSM').cookies is get_session('MHM').cookies
+    (True, False)
+    >>> get_session('JSM').get_adapter('https://jsmliving.com/') is get_session('MHM').get_adapter('https://mhmproperties.com/')
+    True
+    """
+    with _session_lock:
+        session = _sessions.get(agency)
+        if session is None:
+            session = _sessions[agency] = make_session(adapter=shared_adapter())
+        return session
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
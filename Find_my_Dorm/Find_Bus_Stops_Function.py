@@ -1,14 +1,14 @@
-import contextily as ctx
-import folium
-import geopy.distance
-import matplotlib.pyplot as plt
-import networkx as nx
-import osmnx as ox
-from operator import itemgetter
-from ortools.constraint_solver import pywrapcp
-from ortools.constraint_solver import routing_enums_pb2
-from geopy.geocoders import Nominatim
-from geopy.point import Point
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from bus_stop_index import bus_stop_index
+from geocoding import default_geocoder
+from road_graph import haversine, road_graph
+
+# OSMnx, NetworkX, OR-Tools and Folium take seconds to import, so they are imported
+# by the functions that need them, not when this module is imported
 
 def Address_to_Location(address):
     """
@@ -20,131 +20,479 @@ def Address_to_Location(address):
         Returns:
         - tuple: A tuple containing the latitude and longitude coordinates.
 
+        Raises:
+        - ValueError: If the address cannot be geocoded.
+
         Example:
         ```python
         location = Address_to_Location("1600 Amphitheatre Parkway, Mountain View, CA")
         print(location)  # Output: (37.423021, -122.083739)
         ```
     """
-    full_address = address+', '+'IL'
-    locator = Nominatim(user_agent="Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/67.0.3396.99 Safari/537.36'")
-    location = locator.geocode(full_address)
-    latitude, longitude = location.latitude, location.longitude
+    # Geocoded through the shared, cached and rate-limited geocoder (see geocoding.py)
+    location = default_geocoder().geocode(address)
+    if location is None:
+        raise ValueError(f"Could not find the location of {address!r}")
+    latitude, longitude = location
     return latitude, longitude
 
-def find_nearby_bus_stops(location, distance):
+# Matrix entry for a pair of nodes with no road between them
+UNREACHABLE = np.iinfo(np.int64).max // 4
+
+def shortest_path_matrix(G, nodes, weight='length'):
     """
-        Find nearby bus stops within a specified distance from the given location.
+        Compute the road distance between every pair of the given nodes in one pass.
+
+        Runs one Dijkstra search per node over the edge lengths and keeps the paths it
+        finds, so the routing solver and the map drawing share the same searches.
 
         Parameters:
-        - location (tuple): A tuple containing the latitude and longitude coordinates.
-        - distance (float): The distance within which to search for bus stops.
+        - G (networkx.MultiDiGraph): The road graph.
+        - nodes (list): The graph nodes, start first.
+        - weight (str, optional): The edge attribute holding the length in meters (default is 'length').
 
         Returns:
-        - folium.Map: A Folium map with markers for the start point, bus stops, and optimized bus routes.
+        - tuple: An integer NumPy matrix of distances in meters (UNREACHABLE where there is no path),
+          and a dict mapping (i, j) positions in ``nodes`` to the node path between them.
 
-        Example:
-        ```python
-        location = (40.11, -88.23)  # Example coordinates for an apartment near UIUC
-        bus_map = find_nearby_bus_stops(location, distance=500)
-        bus_map.save("bus_stops_map.html")
-        ```
+        Doctests:
+        >>> import networkx as nx
+        >>> G = nx.MultiDiGraph()
+        >>> G.add_edge('a', 'b', length=120.4)
+        0
+        >>> G.add_edge('b', 'c', length=80.0)
+        0
+        >>> matrix, paths = shortest_path_matrix(G, ['a', 'c'])
+        >>> matrix.tolist() == [[0, 200], [UNREACHABLE, 0]], paths[(0, 1)]
+        (True, ['a', 'b', 'c'])
     """
-    # Input the apartment/house's location (latitude, longtitude)
-    DORM_LOCATION = location
-    # Specify distance in meters
-    DIST = 500
-    # Specify the number of vehicles
-    NUM_VEHICLES = 4
-    # Get the highway graph
-    G = ox.graph_from_point(DORM_LOCATION, dist=DIST, network_type='drive') 
-    # Use the nearest node to the dorm location as the start
-    start = ox.distance.nearest_nodes(G, DORM_LOCATION[1], DORM_LOCATION[0]) 
-    # Find bus stops
-    bus_stops = ox.features_from_point(DORM_LOCATION, {"highway": "bus_stop"}, dist=DIST)
-    # Get the nearest nodes to bus stops
-    bus_stop_nodes = list(map(itemgetter(1), bus_stops.index.values)) 
-    # Combine start and bus_stops
-    nodes = [start] + bus_stop_nodes
-    # Add bus stops to the graph
-    for index, bus_stop in bus_stops.iterrows(): 
-        #Find nearest node of bus stop
-        nearest_node = ox.distance.nearest_nodes(G, bus_stop.geometry.x, bus_stop.geometry.y) 
-        distance = geopy.distance.distance((G.nodes[nearest_node]['y'], G.nodes[nearest_node]['x']), (bus_stop.geometry.y, bus_stop.geometry.x))
-        # Add bus stop node
-        G.add_node(index[1], x=bus_stop.geometry.x, y=bus_stop.geometry.y) 
-        G.add_edge(index[1], nearest_node, weight=distance.m)
-        G.add_edge(nearest_node, index[1], weight=distance.m)
-
-    # Get edges as GeoDataFrames
-    edges = ox.graph_to_gdfs(G, nodes=False, edges=True)
+    import networkx as nx
+    matrix = np.full((len(nodes), len(nodes)), UNREACHABLE, dtype=np.int64)
+    paths = {}
+    for i, source in enumerate(nodes):
+        lengths, routes = nx.single_source_dijkstra(G, source, weight=weight)
+        for j, target in enumerate(nodes):
+            if target in lengths:
+                matrix[i, j] = int(round(lengths[target]))
+                paths[(i, j)] = routes[target]
+    return matrix, paths
+
+def snap_bus_stops(G, stop_ids, lats, lons):
+    """
+        Connect all bus stops to the road graph in one batch.
+
+        Every stop is added as a node, linked both ways to its nearest road node by an
+        edge as long as the straight line between them. The nearest nodes come from a
+        single spatial-tree query and the edge lengths from one vectorized haversine,
+        so this scales to every stop of the MTD network.
+
+        Parameters:
+        - G (networkx.MultiDiGraph): The road graph; it is modified in place.
+        - stop_ids (array-like): The bus stops' node ids.
+        - lats, lons (array-like): The bus stops' latitudes and longitudes.
+
+        Returns:
+        - numpy.ndarray: The road node each stop was connected to.
+    """
+    import osmnx as ox
+    stop_ids = list(stop_ids)
+    if not stop_ids:
+        return np.array([], dtype=np.int64)
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    nearest = np.asarray(ox.distance.nearest_nodes(G, lons, lats))
+    lengths = haversine(lats, lons, [G.nodes[n]['y'] for n in nearest], [G.nodes[n]['x'] for n in nearest]).tolist()
+    G.add_nodes_from((stop, {'x': x, 'y': y}) for stop, x, y in zip(stop_ids, lons.tolist(), lats.tolist()))
+    pairs = list(zip(stop_ids, nearest.tolist(), lengths))
+    G.add_edges_from((stop, node, {'weight': length, 'length': length}) for stop, node, length in pairs)
+    G.add_edges_from((node, stop, {'weight': length, 'length': length}) for stop, node, length in pairs)
+    return nearest
+
+class SolverParams:
+    """
+    The search budget for the bus route solver.
+
+    Parameters:
+    - time_limit (float, optional): Seconds the solver may search at most (default is 1.0).
+    - solution_limit (int, optional): Stop after this many improving solutions (default is no limit).
+    - metaheuristic (str, optional): An OR-Tools LocalSearchMetaheuristic, e.g. 'GREEDY_DESCENT',
+      'GUIDED_LOCAL_SEARCH' or 'TABU_SEARCH' (default is 'AUTOMATIC').
+    - first_solution (str, optional): An OR-Tools FirstSolutionStrategy (default is 'PATH_CHEAPEST_ARC').
+
+    >>> SolverParams(time_limit=0.5, metaheuristic='GUIDED_LOCAL_SEARCH')
+    SolverParams(time_limit=0.5, solution_limit=None, metaheuristic='GUIDED_LOCAL_SEARCH', first_solution='PATH_CHEAPEST_ARC')
+    """
+
+    def __init__(self, time_limit=1.0, solution_limit=None, metaheuristic='AUTOMATIC', first_solution='PATH_CHEAPEST_ARC'):
+        self.time_limit = time_limit
+        self.solution_limit = solution_limit
+        self.metaheuristic = metaheuristic
+        self.first_solution = first_solution
+
+    def search_parameters(self):
+        """Return the OR-Tools search parameters for this budget."""
+        from ortools.constraint_solver import pywrapcp, routing_enums_pb2
+        search_parameters = pywrapcp.DefaultRoutingSearchParameters()
+        search_parameters.first_solution_strategy = getattr(routing_enums_pb2.FirstSolutionStrategy, self.first_solution)
+        search_parameters.local_search_metaheuristic = getattr(routing_enums_pb2.LocalSearchMetaheuristic, self.metaheuristic)
+        if self.time_limit is not None:
+            search_parameters.time_limit.FromMilliseconds(int(self.time_limit * 1000))
+        if self.solution_limit is not None:
+            search_parameters.solution_limit = self.solution_limit
+        return search_parameters
+
+    def key(self):
+        """
+        Return a hashable summary of the budget, part of every SolutionCache key.
+
+        >>> SolverParams().key() == SolverParams(time_limit=1.0).key(), SolverParams().key() == SolverParams(time_limit=5).key()
+        (True, False)
+        """
+        return (self.time_limit, self.solution_limit, self.metaheuristic, self.first_solution)
+
+    def __repr__(self):
+        return (f"SolverParams(time_limit={self.time_limit!r}, solution_limit={self.solution_limit!r}, "
+                f"metaheuristic={self.metaheuristic!r}, first_solution={self.first_solution!r})")
+
+
+def _status_name(status):
+    from ortools.constraint_solver import pywrapcp, routing_enums_pb2
+    try:
+        return routing_enums_pb2.RoutingSearchStatus.Value.Name(status)
+    except AttributeError:
+        # Older OR-Tools keep the statuses on the RoutingModel class
+        names = {getattr(pywrapcp.RoutingModel, name): name for name in dir(pywrapcp.RoutingModel) if name.startswith('ROUTING_')}
+        return names.get(status, str(status))
+
+
+class RouteSolution:
+    """
+    The routes found by the solver and how the search went.
+
+    - routes (list): One list of node positions (or node ids, once planned) per vehicle, depot first and last.
+    - objective (int): The solver's objective value, None if no solution was found.
+    - seconds (float): Wall time spent solving, or looking the solution up when it was cached.
+    - status (str): The OR-Tools search status, e.g. 'ROUTING_SUCCESS'.
+    - cached (bool): Whether the solution came from the cache instead of the solver.
+    """
+
+    def __init__(self, routes, objective, seconds, status, cached=False):
+        self.routes = routes
+        self.objective = objective
+        self.seconds = seconds
+        self.status = status
+        self.cached = cached
+
+    @property
+    def ok(self):
+        return self.objective is not None
+
+    def __repr__(self):
+        return (f"RouteSolution(objective={self.objective!r}, seconds={self.seconds:.3f}, "
+                f"status={self.status!r}, cached={self.cached!r})")
+
+
+class SolutionCache:
+    """
+    Keeps recent route solutions, keyed by start node, stop set, vehicle count and
+    search budget, so a quick low-budget solution never answers a call that asks for more.
+
+    The least recently used solutions are dropped beyond ``max_entries``.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._solutions = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(start, stops, num_vehicles, params=None):
+        params = params if params is not None else SolverParams()
+        return (start, frozenset(stops), num_vehicles, params.key())
+
+    def get(self, key):
+        with self._lock:
+            solution = self._solutions.get(key)
+            if solution is None:
+                self.misses += 1
+                return None
+            self._solutions.move_to_end(key)
+            self.hits += 1
+            return solution
+
+    def put(self, key, solution):
+        with self._lock:
+            self._solutions[key] = solution
+            self._solutions.move_to_end(key)
+            while len(self._solutions) > self.max_entries:
+                self._solutions.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._solutions.clear()
+
+    def __len__(self):
+        return len(self._solutions)
+
+
+default_solution_cache = SolutionCache()
+
+def solve_routes(matrix, num_vehicles, params=None):
+    """
+        Solve the vehicle routing problem over a distance matrix, starting and ending at position 0.
+
+        Parameters:
+        - matrix (numpy.ndarray): Integer distances in meters between all positions.
+        - num_vehicles (int): The number of vehicles (routes).
+        - params (SolverParams, optional): The search budget (default is SolverParams()).
+
+        Returns:
+        - RouteSolution: The routes as lists of matrix positions, with the solver metrics.
+
+        Doctests:
+        >>> matrix = np.array([[0, 100, 200], [100, 0, 100], [200, 100, 0]])
+        >>> solution = solve_routes(matrix, 1, SolverParams(time_limit=1))
+        >>> solution.routes in ([[0, 1, 2, 0]], [[0, 2, 1, 0]]), solution.objective
+        (True, 40400)
+    """
+    from ortools.constraint_solver import pywrapcp
+    params = params or SolverParams()
+    began = time.perf_counter()
+    # Plain nested lists are much faster to index from the solver callback than NumPy
+    costs = matrix.tolist()
+    # No route can be longer than visiting every stop once along its longest leg
+    max_route_distance = int(np.where(matrix < UNREACHABLE, matrix, 0).max(axis=1).sum())
     # Create the routing index manager
-    manager = pywrapcp.RoutingIndexManager(len(nodes), NUM_VEHICLES, nodes.index(start))
+    manager = pywrapcp.RoutingIndexManager(len(costs), num_vehicles, 0)
     # Create routing model
     routing = pywrapcp.RoutingModel(manager)
     # Define distance callback
     def distance_callback(from_node_index, to_node_index):
-        from_node = nodes[manager.IndexToNode(from_node_index)]
-        to_node = nodes[manager.IndexToNode(to_node_index)]
-        return nx.shortest_path_length(G, from_node, to_node)
+        return costs[manager.IndexToNode(from_node_index)][manager.IndexToNode(to_node_index)]
     # Register distance callback
     transit_callback_index = routing.RegisterTransitCallback(distance_callback)
     routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
     # Add Distance constraint.
     dimension_name = 'Distance'
-    routing.AddDimension(transit_callback_index, 0, 3000, True, dimension_name)
+    routing.AddDimension(transit_callback_index, 0, max_route_distance, True, dimension_name)
     distance_dimension = routing.GetDimensionOrDie(dimension_name)
     distance_dimension.SetGlobalSpanCostCoefficient(100)
-    # Set path-cheapest-arc search strategy
-    search_parameters = pywrapcp.DefaultRoutingSearchParameters()
-    search_parameters.first_solution_strategy = routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC
-    # Solve the problem
-    solution = routing.SolveWithParameters(search_parameters)
-    total_distance = 0
-    for vehicle_id in range(NUM_VEHICLES):
+    # Solve the problem within the budget
+    solution = routing.SolveWithParameters(params.search_parameters())
+    status = _status_name(routing.status())
+    if solution is None:
+        return RouteSolution([], None, time.perf_counter() - began, status)
+    routes = []
+    for vehicle_id in range(num_vehicles):
         index = routing.Start(vehicle_id)
-        route_distance = 0
         route = []
         while not routing.IsEnd(index):
-            node_index = manager.IndexToNode(index)
-            route.append(node_index)
-            previous_index = index
+            route.append(manager.IndexToNode(index))
             index = solution.Value(routing.NextVar(index))
-            route_distance += routing.GetArcCostForVehicle(previous_index, index, vehicle_id)
         route.append(manager.IndexToNode(index))
-        total_distance += route_distance
-    m = folium.Map(location=DORM_LOCATION, zoom_start=16)
+        routes.append(route)
+    return RouteSolution(routes, solution.ObjectiveValue(), time.perf_counter() - began, status)
+
+class BusRoutePlan:
+    """
+    Everything needed to draw the bus stops around a location and the routes through them.
+
+    - location (tuple): The (latitude, longitude) searched around.
+    - start (tuple): (latitude, longitude) of the road node the routes start from.
+    - stops (list): (latitude, longitude) of every bus stop found.
+    - routes (list): One list of (latitude, longitude) polylines per vehicle, one per route leg.
+    - solution (RouteSolution): The solver metrics; its routes hold graph node ids.
+    """
+
+    def __init__(self, location, start, stops, routes, solution):
+        self.location = location
+        self.start = start
+        self.stops = stops
+        self.routes = routes
+        self.solution = solution
+
+def plan_bus_routes(location, distance=500, num_vehicles=4, params=None, cache=default_solution_cache):
+    """
+        Find the bus stops around a location and solve the routes through them.
+
+        Parameters:
+        - location (tuple): A tuple containing the latitude and longitude coordinates.
+        - distance (float, optional): The distance in meters within which to search for bus stops (default is 500).
+        - num_vehicles (int, optional): The number of routes (default is 4).
+        - params (SolverParams, optional): The solver's search budget.
+        - cache (SolutionCache, optional): Where solutions are reused from; None solves every time.
+
+        Returns:
+        - BusRoutePlan: The stops, the route polylines and the solver metrics.
+
+        Raises:
+        - RuntimeError: If the solver finds no solution within its budget.
+    """
+    import networkx as nx
+    import osmnx as ox
+    # Cut the highway graph around the location out of the cached regional graph
+    G = road_graph('drive').subgraph(location, distance)
+    # Use the nearest node to the dorm location as the start
+    start = ox.distance.nearest_nodes(G, location[1], location[0])
+    # Find bus stops in the local index instead of asking Overpass
+    stops = bus_stop_index()
+    found = stops.within(location, distance)
+    bus_stop_nodes = stops.ids[found].tolist()
+    # Connect all bus stops to the graph at once
+    snap_bus_stops(G, bus_stop_nodes, stops.lats[found], stops.lons[found])
+    # Combine start and bus_stops
+    nodes = [start] + bus_stop_nodes
+
+    key = SolutionCache.key(start, bus_stop_nodes, num_vehicles, params)
+    began = time.perf_counter()
+    solution = cache.get(key) if cache is not None else None
+    if solution is not None:
+        # Report the time the lookup took, not the time the original solve took
+        solution = RouteSolution(solution.routes, solution.objective, time.perf_counter() - began,
+                                 solution.status, cached=True)
+        paths = {}
+    else:
+        # Road distances in meters between the start and every stop, from one search per node
+        matrix, paths = shortest_path_matrix(G, nodes)
+        # A stop the start cannot reach (or cannot get back from) cannot be part of a route
+        keep = [i for i in range(len(nodes)) if matrix[0, i] < UNREACHABLE and matrix[i, 0] < UNREACHABLE]
+        solution = solve_routes(matrix[np.ix_(keep, keep)], num_vehicles, params)
+        if not solution.ok:
+            raise RuntimeError(f"No bus route found around {location} ({solution.status})")
+        # Keep the routes as graph nodes, so they do not depend on the order of the stops
+        solution.routes = [[nodes[keep[i]] for i in route] for route in solution.routes]
+        paths = {(nodes[i], nodes[j]): path for (i, j), path in paths.items()}
+        if cache is not None:
+            cache.put(key, solution)
+
+    def coords(path):
+        return [(G.nodes[node]['y'], G.nodes[node]['x']) for node in path]
+
+    routes = []
+    for route in solution.routes:
+        # Reuse the shortest paths found while building the distance matrix
+        legs = [paths.get((a, b)) or nx.shortest_path(G, a, b, weight='length') for a, b in zip(route, route[1:])]
+        routes.append([coords(path) for path in legs])
+    return BusRoutePlan(location, coords([start])[0], list(zip(stops.lats[found].tolist(), stops.lons[found].tolist())),
+                        routes, solution)
+
+# Route colors, one per vehicle
+ROUTE_COLORS = ['orange', 'purple', 'brown', 'blue']
+# Draws every clustered stop with the same bus icon the single markers used
+STOP_MARKER_CALLBACK = """function (row) {
+    var icon = L.AwesomeMarkers.icon({icon: 'bus', prefix: 'fa', markerColor: 'green'});
+    return L.marker(new L.LatLng(row[0], row[1]), {icon: icon}).bindTooltip('Bus Stop (' + row[0] + ', ' + row[1] + ')');
+}"""
+
+def plan_to_geojson(plan, precision=6):
+    """
+        Convert a bus route plan into a GeoJSON FeatureCollection, for clients that draw their own maps.
+
+        The start and the stops are Point features and every vehicle's route is one
+        MultiLineString feature, with coordinates rounded to ``precision`` decimals.
+
+        Parameters:
+        - plan (BusRoutePlan): The plan returned by plan_bus_routes.
+        - precision (int, optional): Decimals kept per coordinate (default is 6, about 10 cm).
+
+        Returns:
+        - dict: The FeatureCollection; its 'properties' hold the solver metrics.
+
+        Doctests:
+        >>> solution = RouteSolution([[1, 2, 1]], 300, 0.01, 'ROUTING_SUCCESS')
+        >>> plan = BusRoutePlan((40.11, -88.23), (40.11, -88.23), [(40.111, -88.231)],
+        ...                     [[[(40.11, -88.23), (40.111, -88.231)], [(40.111, -88.231), (40.11, -88.23)]]], solution)
+        >>> collection = plan_to_geojson(plan)
+        >>> [feature['properties']['kind'] for feature in collection['features']]
+        ['start', 'stop', 'route']
+        >>> collection['features'][2]['geometry']['coordinates'][0]
+        [[-88.23, 40.11], [-88.231, 40.111]]
+        >>> collection['properties']['objective'], collection['properties']['status']
+        (300, 'ROUTING_SUCCESS')
+    """
+    def point(lat, lon):
+        return [round(lon, precision), round(lat, precision)]
+
+    features = [{'type': 'Feature', 'geometry': {'type': 'Point', 'coordinates': point(*plan.start)},
+                 'properties': {'kind': 'start'}}]
+    features += [{'type': 'Feature', 'geometry': {'type': 'Point', 'coordinates': point(*stop)},
+                  'properties': {'kind': 'stop'}} for stop in plan.stops]
+    for vehicle_id, segments in enumerate(plan.routes):
+        if not any(len(segment) > 1 for segment in segments):
+            # A vehicle that never leaves the start has nothing to draw
+            continue
+        features.append({'type': 'Feature',
+                         'geometry': {'type': 'MultiLineString',
+                                      'coordinates': [[point(*coords) for coords in segment] for segment in segments if len(segment) > 1]},
+                         'properties': {'kind': 'route', 'vehicle': vehicle_id,
+                                        'color': ROUTE_COLORS[vehicle_id % len(ROUTE_COLORS)]}})
+    solution = plan.solution
+    return {'type': 'FeatureCollection', 'features': features,
+            'properties': {'objective': solution.objective, 'seconds': solution.seconds,
+                           'status': solution.status, 'cached': solution.cached}}
+
+def render_bus_map(plan, zoom_start=16):
+    """
+        Draw a bus route plan on a Folium map.
+
+        The routes are drawn as a single GeoJSON layer and the stops as one clustered
+        layer built in the browser from a plain coordinate list, so the HTML stays
+        small even where there are many stops.
+
+        Parameters:
+        - plan (BusRoutePlan): The plan returned by plan_bus_routes.
+        - zoom_start (int, optional): The initial zoom level (default is 16).
+
+        Returns:
+        - folium.Map: A Folium map with markers for the start point, bus stops, and optimized bus routes.
+    """
+    import folium
+    from folium.plugins import FastMarkerCluster
+    collection = plan_to_geojson(plan)
+    m = folium.Map(location=plan.location, zoom_start=zoom_start)
     # Plot start
-    start_coords = (G.nodes[start]['y'], G.nodes[start]['x'])
+    start_coords = plan.start
     folium.Marker(location=start_coords, icon=folium.Icon(color='red', icon='home', prefix='fa'), tooltip=f"Start {start_coords}").add_to(m)
+    # Plot routes as one layer
+    routes = {'type': 'FeatureCollection', 'features': [f for f in collection['features'] if f['properties']['kind'] == 'route']}
+    if routes['features']:
+        folium.GeoJson(routes, name='Bus routes',
+                       style_function=lambda feature: {'color': feature['properties']['color'], 'weight': 5}).add_to(m)
+    # Plot bus stops as one clustered layer
+    stops = [[lat, lon] for lon, lat in (f['geometry']['coordinates'] for f in collection['features'] if f['properties']['kind'] == 'stop')]
+    FastMarkerCluster(stops, callback=STOP_MARKER_CALLBACK, name='Bus stops').add_to(m)
+    return m
 
-    # Plot bus stops
-    for index, bus_stop in bus_stops.iterrows():
-        stop_coords = (bus_stop.geometry.y, bus_stop.geometry.x)
-        folium.Marker(location=stop_coords, icon=folium.Icon(color='green', icon='bus', prefix='fa'), tooltip=f"Bus Stop {stop_coords}").add_to(m)
-    colors = ['orange', 'purple', 'brown', 'blue']
-    # Plot routes
-    for vehicle_id in range(NUM_VEHICLES):
-        index = routing.Start(vehicle_id)
-        route = []
-        while not routing.IsEnd(index):
-            node_index = manager.IndexToNode(index)
-            route.append(nodes[node_index])
-            index = solution.Value(routing.NextVar(index))
-        route.append(nodes[manager.IndexToNode(index)])
-        color = colors[vehicle_id % NUM_VEHICLES]
-        # Create a list of line segments for the route
-        segments = []
-        for i in range(len(route)-1):
-            # Get shortest path between nodes
-            path = nx.shortest_path(G, route[i], route[i + 1], weight='length')
-            # Add line segment to list
-            segments.append([(G.nodes[node]['y'], G.nodes[node]['x']) for node in path])
-        # Create polyline from line segments and add to map
-        for segment in segments:
-            folium.PolyLine(locations=segment, color=color, weight=5).add_to(m)
-    # Return map
-    return m  
+def find_nearby_bus_stops(location, distance, params=None):
+    """
+        Find nearby bus stops within a specified distance from the given location.
+
+        Parameters:
+        - location (tuple): A tuple containing the latitude and longitude coordinates.
+        - distance (float): The distance within which to search for bus stops.
+        - params (SolverParams, optional): The route solver's search budget.
+
+        Returns:
+        - folium.Map: A Folium map with markers for the start point, bus stops, and optimized bus routes.
+
+        Example:
+        ```python
+        location = (40.11, -88.23)  # Example coordinates for an apartment near UIUC
+        bus_map = find_nearby_bus_stops(location, distance=500)
+        bus_map.save("bus_stops_map.html")
+        ```
+    """
+    # Input the apartment/house's location (latitude, longtitude)
+    DORM_LOCATION = location
+    # Specify distance in meters
+    DIST = 500
+    # Specify the number of vehicles
+    NUM_VEHICLES = 4
+    plan = plan_bus_routes(DORM_LOCATION, DIST, NUM_VEHICLES, params)
+    # Draw the plan, reusing the paths found while solving
+    return render_bus_map(plan)
 
 def bus_stops_searcher(address, distance=500):
     """
@@ -167,10 +515,33 @@ def bus_stops_searcher(address, distance=500):
     bus_map = find_nearby_bus_stops(location, distance = 500)
     return bus_map
 
+def bus_routes_geojson(address, distance=500, params=None):
+    """
+        Like bus_stops_searcher, but return the stops and routes as GeoJSON data instead of a map.
+
+        Parameters:
+        - address (str): The address for which to find nearby bus stops.
+        - distance (float, optional): The distance within which to search for bus stops (default is 500 meters).
+        - params (SolverParams, optional): The route solver's search budget.
+
+        Returns:
+        - dict: A GeoJSON FeatureCollection, see plan_to_geojson.
+
+        Example:
+        ```python
+        import json
+        with open("bus_routes.geojson", "w") as f:
+            json.dump(bus_routes_geojson("501 E. Healey"), f)
+        ```
+    """
+    location = Address_to_Location(address)
+    return plan_to_geojson(plan_bus_routes(location, distance, params=params))
+
 def test_bus_stops_searcher():
     """
     Test the bus_stops_searcher function.
     """
+    import folium
     # Mocking an address near UIUC for testing
     test_address = "501 E. Healey, Champaign"
 
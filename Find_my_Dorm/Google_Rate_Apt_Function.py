@@ -1,49 +1,90 @@
-import googlemaps
-import matplotlib.pyplot as plt
+import os
+
 import pandas as pd
 
+import config  # noqa: F401  (puts ./Apartments on the path)
+from address import normalize_addresses
+from places import PlacesFetcher, default_rating_cache
+from ranking_report import ROWS_PER_PAGE, rank_listings, write_report
+
 
 def dataframe_to_list(df):
     """
     Transforms a dataframe of apartment listings into a list of unique listings by address.
 
-    Cleans 'Address' column by removing extraneous information, groups by address, and
-    aggregates to ensure unique entries. Outputs a list with the format "Address, Agency Name".
+    Normalizes the 'Address' column down to the building (see Apartments/address.py), so
+    every unit of a building is one entry, and keeps the first agency listing it.
+    Outputs a list with the format "Address, Agency Name", sorted by address.
 
     Parameters:
     - df (pandas.DataFrame): Dataframe with 'Address' and 'Name' columns.
 
     Returns:
     - list: Unique listings as strings.
+
+    >>> dataframe_to_list(pd.DataFrame({'Address': ['106 E. John St. / Champaign,', '106 E John Street', '54 E Green St'],
+    ...                                 'Name': ['Wampler', 'JSJ', 'JSM']}))
+    ['106 E John St, Wampler', '54 E Green St, JSM']
+    """
+    buildings = pd.DataFrame({'Address': normalize_addresses(df['Address'], building=True), 'Name': df['Name']})
+    buildings = buildings.dropna(subset=['Address']).drop_duplicates('Address').sort_values('Address')
+    return (buildings['Address'] + ', ' + buildings['Name'].astype(str)).tolist()
+
+
+
+# input your Google API key here or in the GOOGLE_MAPS_API_KEY environment variable
+GOOGLE_API_KEY = os.environ.get('GOOGLE_MAPS_API_KEY', '')
+_gmaps = None
+_fetcher = None
+
+
+def get_gmaps():
+    """
+    Return the Google Maps client, created on first use.
+
+    Creating it lazily keeps importing this module cheap and lets the scraping-only
+    parts of the project run without an API key.
     """
-    df['Address'] = df['Address'].str.replace(', Champaign', '').replace(', Urbana', '').replace(' - January 2024','').replace('. / Champaign,','').replace('. / Urbana,','').replace(' / Urbana,','')
-    combined_apartments = df.groupby('Address').apply(lambda x: f"{x.name}, {x['Name'].iloc[0]}").tolist()
-    return combined_apartments
+    global _gmaps
+    if _gmaps is None:
+        import googlemaps
+        _gmaps = googlemaps.Client(key=GOOGLE_API_KEY)
+    return _gmaps
 
 
+def set_gmaps(client):
+    """Use ``client`` (e.g. ``googlemaps.Client(key=...)``) for every Places lookup."""
+    global _gmaps, _fetcher
+    _gmaps = client
+    _fetcher = None
 
-# Initialize Google Maps client
-gmaps = googlemaps.Client(key='')  # input your Google API
 
 
+def places_fetcher():
+    """Return the concurrent, quota-aware Places fetcher around the Google Maps client, with the rating cache."""
+    global _fetcher
+    if _fetcher is None:
+        _fetcher = PlacesFetcher(get_gmaps(), cache=default_rating_cache())
+    return _fetcher
+
+
+def _rating_text(place):
+    # The string form the ranking table expects, 'null' for no rating
+    if not place.ok:
+        print(f"Error fetching place details: {place.error}")
+        return 'null'
+    return 'null' if place.rating is None else str(place.rating)
+
 
 def get_place_rating(address):
     """
-    Fetches the Google Maps place rating for a given address.
+    Fetches the Google Maps place rating for a given address, searched within places.REGION.
 
     Args: address (str): The address to search for.
 
     Returns: str: The rating as a string, or 'null' if not available.
     """
-    try:
-        place_details = gmaps.places(address)
-        if 'results' in place_details and place_details['results']:
-            return str(place_details['results'][0].get('rating', 'null'))
-        else:
-            return 'null'
-    except Exception as e:
-        print(f"Error fetching place details: {e}")
-        return 'null'
+    return _rating_text(places_fetcher().fetch_listings([(address, None)])[0])
 
 
 def append_ratings_to_listings(combined_list):
@@ -51,15 +92,21 @@ def append_ratings_to_listings(combined_list):
     Appends Google Maps ratings to each listing in combined listings.
     Excludes listings with a rating of '0' or 'null'.
 
-    Args: combined_list (list of str): The list of apartment listings.
+    Each listing is searched by its full address and agency. Repeated listings are
+    looked up once, ratings from the last week come from the cache, and the rest are
+    fetched concurrently within the Places quota, see places.PlacesFetcher.
+
+    Args: combined_list (list of str): The list of apartment listings, as "Address, Agency Name".
 
     Returns: list of str: The updated list with ratings appended, excluding '0' or 'null' ratings.
     """
     updated_list = []
+    # Split "Address, Agency Name" at its last comma, so addresses with commas stay whole
+    listings = [listing.rsplit(', ', 1) if ', ' in listing else (listing, None) for listing in combined_list]
+    places = places_fetcher().fetch_listings(listings)
 
-    for listing in combined_list:
-        address = listing.split()[0]  # Assuming the address is the first element in the listing
-        rating = get_place_rating(address)
+    for listing, place in zip(combined_list, places):
+        rating = _rating_text(place)
 
         # Skip adding the rating if it's '0' or 'null'
         if rating not in ('0', 'null'):
@@ -69,54 +116,33 @@ def append_ratings_to_listings(combined_list):
 
 
 
-def create_apartment_ranking_table(updated_list):
+def create_apartment_ranking_table(updated_list, output_dir=None, formats=('png', 'html', 'csv'),
+                                   rows_per_page=ROWS_PER_PAGE):
     """
-    Generates and displays a table ranking apartments.
+    Ranks rated apartments by their Google Maps rating and optionally writes a report.
+
+    Nothing is drawn on screen, so this also works headless. The report has the table
+    as PNG pages of ``rows_per_page`` rows, plus all of it in one HTML page and a CSV
+    file, see ranking_report.write_report.
 
     Parameters:
-        df (pd.DataFrame): DataFrame containing apartment information.
+    - updated_list (list of str): Listings as "Address, Agency Name, Rating", from append_ratings_to_listings.
+    - output_dir (str, optional): Where to write the report; None only builds the table.
+    - formats (tuple, optional): The report formats, any of 'png', 'html' and 'csv'.
+    - rows_per_page (int, optional): Rows on each PNG page (default is ROWS_PER_PAGE).
+
+    Returns:
+    - pandas.DataFrame: The ranking, with 'Ranking', 'Apartment Name', 'Agency Name' and 'Rating' columns.
+
+    Example:
+    ```python
+    Ranked_apt = create_apartment_ranking_table(Rated_apt, output_dir='ranking')
+    ```
     """
-    # Adjusted columns to match the updated_list format
-    columns = [
-        'Apartment Name', 'Agency Name', 'Rating'
-    ]
-    # Split each item in the updated_list and check for the correct number of elements
-    data_for_df = []
-
-    for item in updated_list:
-        split_item = item.split(', ')
-        if len(split_item) == 3:  # If the split list has three elements, it matches the columns
-            data_for_df.append(split_item)
-
-    # Create DataFrame with the correct number of columns
-    df = pd.DataFrame(data_for_df, columns=columns)
-
-    # Convert 'Rating' to numeric and sort by it
-    df['Rating'] = pd.to_numeric(df['Rating'], errors='coerce')
-    df.dropna(subset=['Rating'], inplace=True)
-    df.sort_values('Rating', ascending=False, inplace=True)
-
-    # Add 'Ranking' column based on the sorted 'Rating'
-    df['Ranking'] = range(1, len(df) + 1)
-
-    # Reorder the columns to include 'Ranking'
-    df = df[['Ranking', 'Apartment Name', 'Agency Name', 'Rating']]
-
-    # Calculate the figure height dynamically
-    figsize_height = max(4, 0.4 * len(df))
-    fig, ax = plt.subplots(figsize=(10, figsize_height))
-    ax.axis('off')
-    table = ax.table(cellText=df.values, colLabels=df.columns, loc='center', cellLoc='center')
-    table.auto_set_font_size(False)
-    table.set_fontsize(14)
-    table.scale(1.2, 2)
-    
-    # Increase the 'pad' parameter to provide more space for the title
-    fig.tight_layout(pad=6.0)
-
-    # Adjust the 'y' parameter to provide more space between the title and the table
-    plt.suptitle('The Ranking of Apartments in Champaign', fontsize=16, weight='bold', y=1.00000001, va='bottom')
-    plt.show()
+    ranking = rank_listings(updated_list)
+    if output_dir is not None:
+        write_report(ranking, output_dir, formats, rows_per_page)
+    return ranking
 
 
 
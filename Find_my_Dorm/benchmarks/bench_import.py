@@ -0,0 +1,56 @@
+"""
+Measure how long it takes to import each project module in a fresh interpreter,
+and which of the heavy geo, solver and plotting packages that pulls in.
+
+Every import runs in a new process, so nothing is shared between measurements;
+the best of a few runs is kept. The last row imports the heavy packages
+themselves, which is what importing Find_Bus_Stops_Function used to cost.
+From the Find_my_Dorm directory:
+
+    python benchmarks/bench_import.py [runs]
+"""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+HEAVY = ['osmnx', 'networkx', 'ortools', 'folium', 'contextily', 'matplotlib', 'scipy', 'geopy', 'googlemaps']
+
+MODULES = {
+    'orchestrator': 'import orchestrator',
+    'Find_Bus_Stops_Function': 'import Find_Bus_Stops_Function',
+    'Google_Rate_Apt_Function': 'import Google_Rate_Apt_Function',
+    'transit_scoring': 'import transit_scoring',
+    'listings_map': 'import listings_map',
+    'heavy packages (eager)': 'import osmnx, networkx, folium, contextily, matplotlib.pyplot; '
+                              'from ortools.constraint_solver import pywrapcp',
+}
+
+SCRIPT = """
+import sys, time
+sys.path[:0] = [{root!r}, {apartments!r}]
+began = time.perf_counter()
+{statement}
+seconds = time.perf_counter() - began
+print(seconds, ','.join(name for name in {heavy!r} if name in sys.modules) or '-', sep='\\t')
+"""
+
+
+def time_import(statement):
+    script = SCRIPT.format(root=ROOT, apartments=os.path.join(ROOT, 'Apartments'), statement=statement, heavy=HEAVY)
+    output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True).stdout
+    seconds, loaded = output.strip().splitlines()[-1].split('\t')
+    return float(seconds), loaded
+
+
+def main(runs=3):
+    print(f"{'module':<28}{'ms':>9}  heavy packages loaded")
+    for name, statement in MODULES.items():
+        results = [time_import(statement) for _ in range(runs)]
+        seconds = min(seconds for seconds, _ in results)
+        print(f"{name:<28}{seconds * 1000:>9.1f}  {results[0][1]}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3)
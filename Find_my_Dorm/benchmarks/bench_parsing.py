@@ -0,0 +1,133 @@
+"""
+Compare parse time and peak memory of the HTML parser backends, with and without
+partial parsing, on pages saved from the agency websites.
+
+Save the pages first (any browser "Save page as" or curl works), naming each file
+after the scraper it belongs to, e.g.:
+
+    curl -o pages/bailey.html http://baileyapartments.com/amenities/
+    curl -o pages/jsj.html https://jsjmanagement.com/on-campus/listing/
+
+then run, from the Find_my_Dorm directory:
+
+    python benchmarks/bench_parsing.py pages
+
+The scrapers parse with html.parser (parsing.DEFAULT_PARSER). Before a scraper opts
+into lxml, check that both backends give it the same rows on its saved page:
+
+    python benchmarks/bench_parsing.py pages --parity
+
+(the Wampler and Ugroup pages are one listing's detail page each).
+"""
+import os
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Apartments'))
+
+import MHM
+import http_cache
+import Ugroup
+import Wampler
+import parsing
+from bailey import Bailey
+from green_street import Green_Street
+from jsj import JSJ
+from jsm import JSM
+
+# Saved page file name (without .html) -> the strainer its scraper uses
+STRAINERS = {
+    'bailey': Bailey.parse_only,
+    'green_street': Green_Street.parse_only,
+    'jsj': JSJ.parse_only,
+    'jsm': JSM.parse_only,
+    'mhm': MHM.PARSE_ONLY,
+    'wampler': Wampler.DETAIL_PARSE_ONLY,
+    'ugroup': Ugroup.DETAIL_PARSE_ONLY,
+}
+SCRAPERS = {'bailey': Bailey, 'green_street': Green_Street, 'jsj': JSJ, 'jsm': JSM}
+
+
+def measure(html, parser, parse_only, repeat=5):
+    """Return (best seconds per parse, peak bytes allocated while parsing)."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parsing.make_soup(html, parser, parse_only)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    soup = parsing.make_soup(html, parser, parse_only)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del soup
+    return best, peak
+
+
+def scraper_rows(stem, html, parser):
+    """Return the rows the scraper of ``stem`` extracts from the saved page ``html`` with ``parser``."""
+    # The scrapers fetch through http_cache; hand them the saved page instead
+    page = mock.patch.object(http_cache, 'fetch', lambda *args, **kwargs: SimpleNamespace(text=html))
+    with page:
+        if stem == 'wampler':
+            with mock.patch.object(Wampler, 'PARSER', parser):
+                row = Wampler.parse_wampler_page(html, stem)
+            return [] if row is None else [row]
+        if stem == 'ugroup':
+            with mock.patch.object(Ugroup, 'PARSER', parser):
+                return Ugroup.parse_ugroup_page(html, stem)
+        if stem == 'mhm':
+            with mock.patch.object(MHM, 'PARSER', parser):
+                return MHM.get_MHM(stem)
+        scraper = SCRAPERS[stem](stem, stem)
+        scraper.parser = parser
+        return [apartment.to_row() for apartment in scraper.parse_data()]
+
+
+def parity(directory):
+    """Print, per saved page, whether lxml and html.parser give its scraper the same rows."""
+    if not parsing.LXML_AVAILABLE:
+        print('lxml is not installed')
+        return
+    for name in sorted(os.listdir(directory)):
+        stem, ext = os.path.splitext(name)
+        if ext != '.html' or stem not in STRAINERS:
+            continue
+        with open(os.path.join(directory, name), encoding='utf-8', errors='replace') as f:
+            html = f.read()
+        rows = {parser: scraper_rows(stem, html, parser) for parser in parsing.PARSERS}
+        if rows['lxml'] == rows['html.parser']:
+            print(f"{stem:<14}same {len(rows['lxml'])} rows")
+            continue
+        print(f"{stem:<14}DIFFERENT: lxml {len(rows['lxml'])} rows, html.parser {len(rows['html.parser'])} rows")
+        for lxml_row, builtin_row in zip(rows['lxml'], rows['html.parser']):
+            if lxml_row != builtin_row:
+                print(f"    lxml:        {lxml_row}\n    html.parser: {builtin_row}")
+
+
+def main(directory, repeat=5):
+    parsers = [parser for parser in parsing.PARSERS if parser != 'lxml' or parsing.LXML_AVAILABLE]
+    print(f"{'page':<14}{'backend':<13}{'partial':<9}{'ms':>9}{'peak KiB':>11}")
+    for name in sorted(os.listdir(directory)):
+        stem, ext = os.path.splitext(name)
+        if ext != '.html' or stem not in STRAINERS:
+            continue
+        with open(os.path.join(directory, name), encoding='utf-8', errors='replace') as f:
+            html = f.read()
+        for parser in parsers:
+            for parse_only in (None, STRAINERS[stem]):
+                seconds, peak = measure(html, parser, parse_only, repeat)
+                partial = 'yes' if parse_only is not None else 'no'
+                print(f"{stem:<14}{parser:<13}{partial:<9}{seconds * 1000:>9.2f}{peak / 1024:>11.0f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    if '--parity' in sys.argv[2:]:
+        parity(sys.argv[1])
+    else:
+        main(sys.argv[1])
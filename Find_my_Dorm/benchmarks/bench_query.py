@@ -0,0 +1,87 @@
+"""
+Compare ListingIndex queries against the pandas boolean masks used in main.ipynb.
+
+Runs on the latest ListingStore snapshot when there is one, otherwise on a
+synthetic set of listings. From the Find_my_Dorm directory:
+
+    python benchmarks/bench_query.py [number of synthetic rows]
+"""
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Apartments'))
+
+from listing_query import ListingIndex, Range
+from listing_store import ListingStore
+from public import apartments_to_frame
+
+
+def synthetic_listings(n, seed=0):
+    rng = np.random.default_rng(seed)
+    agencies = ['MHM', 'Wampler', 'Ugroup', 'Bailey', 'Green Street', 'JSJ', 'JSM']
+    bedrooms = rng.integers(1, 6, n)
+    return apartments_to_frame([
+        [f'{i} Green St', float(rng.integers(500, 4000)), int(bedrooms[i]), float(rng.choice([1.0, 1.5, 2.0, 2.5, 3.0])),
+         f'https://example.com/{i}', '2024-08', agencies[i % len(agencies)], bool(bedrooms[i] == 1 and i % 3 == 0)]
+        for i in range(n)
+    ])
+
+
+# name -> (pandas mask query, equivalent ListingIndex query)
+QUERIES = {
+    'bathrooms > 2': (lambda df: df[df['Bathroom'] > 2],
+                      lambda index: index.query(bathrooms=Range(gt=2))),
+    'price < 1000': (lambda df: df[df['Price'] < 1000],
+                     lambda index: index.query(price=Range(lt=1000))),
+    '2-3 bed, 1000-1500, JSM/MHM, top 10': (
+        lambda df: df[(df['Bedroom'] >= 2) & (df['Bedroom'] <= 3) & (df['Price'] >= 1000) & (df['Price'] <= 1500)
+                      & df['Name'].isin(['JSM', 'MHM'])].nsmallest(10, 'Price'),
+        lambda index: index.query(bedrooms=(2, 3), price=(1000, 1500), agency=['JSM', 'MHM'], order_by='Price', k=10)),
+    'studios under 900, top 5': (
+        lambda df: df[df['Is_studio'] & (df['Price'] < 900)].nsmallest(5, 'Price'),
+        lambda index: index.query(is_studio=True, price=Range(lt=900), order_by='Price', k=5)),
+}
+
+
+def best_of(func, number):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number
+
+
+def main(n=5000, number=200):
+    store = ListingStore()
+    if store.latest() is not None and len(sys.argv) < 2:
+        df = store.load()
+        print(f"Latest snapshot: {len(df)} listings")
+    else:
+        df = synthetic_listings(n)
+        print(f"Synthetic listings: {len(df)}")
+    build = best_of(lambda: ListingIndex(df), 5)
+    index = ListingIndex(df)
+    print(f"Index build: {build * 1000:.2f} ms")
+    print(f"{'query':<40}{'rows':>6}{'pandas us':>12}{'index us':>11}{'index ids us':>14}")
+    for name, (mask_query, index_query) in QUERIES.items():
+        rows = len(index_query(index))
+        pandas_time = best_of(lambda: mask_query(df), number)
+        index_time = best_of(lambda: index_query(index), number)
+        predicates = _predicates(index_query)
+        ids_time = best_of(lambda: index.query_ids(**predicates), number)
+        print(f"{name:<40}{rows:>6}{pandas_time * 1e6:>12.1f}{index_time * 1e6:>11.1f}{ids_time * 1e6:>14.1f}")
+
+
+def _predicates(index_query):
+    # Capture the keyword arguments an index query passes, to time query_ids alone
+    captured = {}
+
+    class Recorder:
+        def query(self, **predicates):
+            captured.update(predicates)
+
+    index_query(Recorder())
+    return captured
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
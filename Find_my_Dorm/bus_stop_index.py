@@ -0,0 +1,121 @@
+import os
+import threading
+
+import numpy as np
+
+from road_graph import CACHE_DIR, REGION_CENTER, REGION_DIST, project
+
+
+class BusStopIndex:
+    """
+    Every bus stop of the region in a KD-tree, for radius and k-nearest queries.
+
+    Coordinates are projected to meters on a plane tangent at the region center
+    (see road_graph.project), so distances are plain Euclidean ones. Queries take microseconds and need no network.
+
+    Parameters:
+    - ids (array-like): OpenStreetMap node ids of the stops.
+    - lats, lons (array-like): The stops' latitudes and longitudes.
+    - names (array-like, optional): The stops' names ('' when unnamed).
+    - center (tuple, optional): (latitude, longitude) the projection is centered on.
+
+    >>> index = BusStopIndex([1, 2, 3], [40.1100, 40.1110, 40.1200], [-88.2270, -88.2270, -88.2270])
+    >>> index.within((40.1100, -88.2270), 200).tolist()
+    [0, 1]
+    >>> distances, positions = index.nearest((40.1190, -88.2270), k=2)
+    >>> distances.round().tolist(), index.ids[positions].tolist()
+    ([111.0, 890.0], [3, 2])
+    """
+
+    def __init__(self, ids, lats, lons, names=None, center=REGION_CENTER):
+        from scipy.spatial import cKDTree
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.lats = np.asarray(lats, dtype=float)
+        self.lons = np.asarray(lons, dtype=float)
+        self.names = np.asarray(names if names is not None else [''] * len(self.ids), dtype=str)
+        self.center = tuple(center)
+        self.tree = cKDTree(self.project(self.lats, self.lons))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def project(self, lats, lons):
+        """Return an (n, 2) array of x, y meters from the center for the given coordinates."""
+        x, y = project(lats, lons, self.center)
+        return np.column_stack([np.atleast_1d(x), np.atleast_1d(y)])
+
+    def within(self, location, dist):
+        """Return the positions of the stops within ``dist`` meters of ``location``, nearest first."""
+        point = self.project(*location)[0]
+        positions = np.asarray(self.tree.query_ball_point(point, dist), dtype=np.intp)
+        order = np.argsort(np.hypot(*(self.tree.data[positions] - point).T), kind='stable')
+        return positions[order]
+
+    def nearest(self, location, k=1):
+        """Return the distances in meters and the positions of the ``k`` stops nearest to ``location``."""
+        k = min(k, len(self))
+        distances, positions = self.tree.query(self.project(*location)[0], k=[i + 1 for i in range(k)])
+        return distances, positions
+
+    def count_within(self, lats, lons, dist):
+        """Return how many stops lie within ``dist`` meters of each of many locations."""
+        return self.tree.query_ball_point(self.project(lats, lons), dist, return_length=True)
+
+    @classmethod
+    def build(cls, center=REGION_CENTER, dist=REGION_DIST):
+        """Download every bus stop around ``center`` from OpenStreetMap."""
+        import osmnx as ox
+        features = ox.features_from_point(center, {"highway": "bus_stop"}, dist=dist)
+        # MTD stops are mapped as nodes; the odd platform drawn as an area is skipped
+        features = features[features.geometry.geom_type == 'Point']
+        names = features['name'].fillna('').astype(str) if 'name' in features else None
+        return cls(features.index.get_level_values(-1), features.geometry.y.values, features.geometry.x.values,
+                   names=None if names is None else names.values, center=center)
+
+    def save(self, path):
+        """Store the stops in a compressed ``.npz`` file; the tree is rebuilt on load."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = path + '.tmp.npz'
+        np.savez_compressed(tmp_path, ids=self.ids, lats=self.lats, lons=self.lons, names=self.names,
+                            center=np.asarray(self.center))
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data['ids'], data['lats'], data['lons'], names=data['names'], center=tuple(data['center']))
+
+
+BUS_STOP_INDEX_PATH = os.path.join(CACHE_DIR, 'bus_stops.npz')
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def bus_stop_index(path=BUS_STOP_INDEX_PATH):
+    """Return the shared BusStopIndex, loaded from disk or, the first time, built from OpenStreetMap."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            if os.path.exists(path):
+                _index = BusStopIndex.load(path)
+            else:
+                _index = BusStopIndex.build()
+                _index.save(path)
+        return _index
+
+
+def rebuild_bus_stop_index(path=BUS_STOP_INDEX_PATH):
+    """Download the bus stops again, e.g. after MTD moved some, and replace the shared index."""
+    global _index
+    index = BusStopIndex.build()
+    index.save(path)
+    with _index_lock:
+        _index = index
+    return index
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
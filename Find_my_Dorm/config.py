@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The scrapers in ./Apartments import each other by bare name. Importing this module
+# puts them on the path, so the rest of the project can share their code.
+APARTMENTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Apartments')
+if APARTMENTS_DIR not in sys.path:
+    sys.path.append(APARTMENTS_DIR)
@@ -0,0 +1,207 @@
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+import config  # noqa: F401  (puts ./Apartments on the path)
+from address import address_key
+from http_cache import CACHE_DIR
+
+# Addresses the provider could not find are asked about again after this many seconds
+MISS_TTL = 30 * 24 * 3600
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/67.0.3396.99 Safari/537.36'"
+
+
+class GeocodeCache:
+    """
+    A persistent SQLite cache of geocoding results keyed by address.address_key.
+
+    Addresses the provider could not find are cached too, so they are not looked up
+    again on every run, but only for ``miss_ttl`` seconds; found locations do not expire.
+    """
+
+    def __init__(self, path=None, miss_ttl=MISS_TTL):
+        self.path = path or os.path.join(CACHE_DIR, 'geocode.sqlite')
+        self.miss_ttl = miss_ttl
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute('CREATE TABLE IF NOT EXISTS locations (key TEXT PRIMARY KEY, lat REAL, lon REAL, stored_at REAL)')
+        self._db.commit()
+
+    def get(self, key):
+        """Return ``(found, location)``; location is None for an address known not to exist."""
+        with self._lock:
+            row = self._db.execute('SELECT lat, lon, stored_at FROM locations WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return False, None
+        if row[0] is None:
+            # A miss may have been a gap in the provider's data that has been filled since
+            return (False, None) if row[2] + self.miss_ttl < time.time() else (True, None)
+        return True, (row[0], row[1])
+
+    def put(self, key, location):
+        lat, lon = location if location is not None else (None, None)
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO locations VALUES (?, ?, ?, ?)', (key, lat, lon, time.time()))
+            self._db.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM locations').fetchone()[0]
+
+
+class NominatimProvider:
+    """Geocodes through OpenStreetMap Nominatim, reusing a single client."""
+
+    def __init__(self, user_agent=USER_AGENT):
+        from geopy.geocoders import Nominatim
+        self.locator = Nominatim(user_agent=user_agent)
+
+    def geocode(self, query):
+        location = self.locator.geocode(query)
+        return None if location is None else (location.latitude, location.longitude)
+
+
+class StaticProvider:
+    """
+    A local stand-in provider that answers from a dict, for offline runs and tests.
+
+    >>> provider = StaticProvider({'501 E. Healey, IL': (40.1094, -88.2305)})
+    >>> provider.geocode('501 e healey, il'), provider.geocode('unknown')
+    ((40.1094, -88.2305), None)
+    """
+
+    def __init__(self, locations):
+        self.locations = {address_key(address): location for address, location in locations.items()}
+        self.calls = 0
+
+    def geocode(self, query):
+        self.calls += 1
+        return self.locations.get(address_key(query))
+
+
+class RateLimiter:
+    """Spaces calls at least ``min_interval`` seconds apart (Nominatim allows one request per second)."""
+
+    def __init__(self, min_interval=1.0):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._last = 0.0
+
+    def wait(self):
+        with self._lock:
+            delay = self._last + self.min_interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self._last = time.monotonic()
+
+
+class Geocoder:
+    """
+    Cached, rate-limited geocoding of listing addresses.
+
+    Parameters:
+    - provider (optional): Any object with ``geocode(query)`` returning (lat, lon) or None
+      (default is NominatimProvider).
+    - cache (GeocodeCache, optional): Where results are kept between runs.
+    - region (str, optional): Appended to every address before geocoding (default is 'IL').
+    - min_interval (float, optional): Minimum seconds between provider calls (default is 1.0).
+
+    >>> import tempfile
+    >>> provider = StaticProvider({'501 E. Healey, IL': (40.1094, -88.2305)})
+    >>> geocoder = Geocoder(provider, GeocodeCache(os.path.join(tempfile.mkdtemp(), 'g.sqlite')), min_interval=0)
+    >>> geocoder.geocode_many(['501 E. Healey', '501 E Healey', 'Nowhere'])
+    {'501 E. Healey': (40.1094, -88.2305), '501 E Healey': (40.1094, -88.2305), 'Nowhere': None}
+    >>> geocoder.geocode('501 e healey'), provider.calls
+    ((40.1094, -88.2305), 2)
+    """
+
+    def __init__(self, provider=None, cache=None, region='IL', min_interval=1.0):
+        self.provider = provider if provider is not None else NominatimProvider()
+        self.cache = cache if cache is not None else GeocodeCache()
+        self.region = region
+        self.limiter = RateLimiter(min_interval)
+
+    def _query(self, address):
+        return f"{address}, {self.region}" if self.region else address
+
+    def geocode(self, address):
+        """Return the (latitude, longitude) of ``address``, or None if it cannot be found."""
+        return self.geocode_many([address])[address]
+
+    def geocode_many(self, addresses, errors=None):
+        """
+        Geocode many addresses, e.g. every listing, at once.
+
+        Addresses that normalize to the same key are looked up once, cached keys are
+        not looked up at all, and the remaining provider calls are rate-limited.
+        An address the provider fails on (a timeout, a server error) maps to None and
+        is not cached, so it is tried again next time; the rest of the batch goes on.
+
+        Parameters:
+        - addresses (list of str): The addresses to locate.
+        - errors (list, optional): If given, an (address, exception) pair is appended for every failed lookup.
+
+        Returns:
+        - dict: Each input address mapped to its (latitude, longitude), or None.
+        """
+        keys = {address: address_key(self._query(address)) for address in addresses}
+        locations = {}
+        for address, key in keys.items():
+            if key in locations:
+                continue
+            found, location = self.cache.get(key)
+            if not found:
+                self.limiter.wait()
+                try:
+                    location = self.provider.geocode(self._query(address))
+                except Exception as e:
+                    if errors is not None:
+                        errors.append((address, e))
+                    locations[key] = None
+                    continue
+                self.cache.put(key, location)
+            locations[key] = location
+        return {address: locations[key] for address, key in keys.items()}
+
+
+def locate_listings(listings, geocoder=None):
+    """
+    Return the latitudes and longitudes of the listings as two arrays, NaN where unknown.
+
+    Existing 'Latitude'/'Longitude' columns (e.g. from transit_scoring.score_listings) are
+    used as they are; otherwise every distinct address is geocoded once through the cache.
+    """
+    if 'Latitude' in listings and 'Longitude' in listings:
+        return np.asarray(listings['Latitude'], dtype=float), np.asarray(listings['Longitude'], dtype=float)
+    geocoder = geocoder if geocoder is not None else default_geocoder()
+    locations = geocoder.geocode_many(listings['Address'].dropna().unique().tolist())
+    points = [locations.get(address) if isinstance(address, str) else None for address in listings['Address']]
+    lats = np.array([np.nan if point is None else point[0] for point in points])
+    lons = np.array([np.nan if point is None else point[1] for point in points])
+    return lats, lons
+
+
+_default_geocoder = None
+
+
+def default_geocoder():
+    """Return the shared Nominatim geocoder backed by the on-disk cache."""
+    global _default_geocoder
+    if _default_geocoder is None:
+        _default_geocoder = Geocoder()
+    return _default_geocoder
+
+
+def set_default_geocoder(geocoder):
+    """Replace the shared geocoder, e.g. with one using a StaticProvider for offline runs."""
+    global _default_geocoder
+    _default_geocoder = geocoder
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,192 @@
+import os
+import pickle
+import threading
+
+import numpy as np
+
+from geocoding import locate_listings
+from road_graph import CACHE_DIR, REGION_CENTER, project, road_graph
+
+# Campus landmarks students commute to, as (latitude, longitude)
+LANDMARKS = {
+    'Illini Union': (40.1092, -88.2272),
+    'Main Library': (40.1047, -88.2289),
+    'Grainger Library': (40.1125, -88.2269),
+    'Siebel Center': (40.1138, -88.2249),
+    'ARC': (40.1013, -88.2360),
+}
+# Travel-time bands in minutes
+BANDS = (5, 10, 15)
+# Mode -> (cached graph, average speed in meters per second). There is no timetable,
+# so the bus is approximated by MTD's average speed on the street network, stops included.
+MODES = {
+    'walk': ('walk', 1.4),
+    'bus': ('drive', 5.0),
+}
+# How far around the reached streets and intersections a band extends, in meters
+EDGE_BUFFER = 25
+NODE_BUFFER = 50
+
+
+def reach_polygon(G, reached, center=REGION_CENTER):
+    """
+    Return the area covered by the ``reached`` nodes of ``G`` and the edges between them.
+
+    The polygon is in meters around ``center`` (see road_graph.project).
+    """
+    import shapely
+    nodes = list(reached)
+    x, y = project([G.nodes[n]['y'] for n in nodes], [G.nodes[n]['x'] for n in nodes], center)
+    position = {node: i for i, node in enumerate(nodes)}
+    lines = [[(x[position[u]], y[position[u]]), (x[position[v]], y[position[v]])]
+             for u, v in G.subgraph(nodes).edges() if u != v]
+    parts = [shapely.buffer(shapely.points(np.column_stack([x, y])), NODE_BUFFER)]
+    if lines:
+        parts.append(shapely.buffer(shapely.linestrings(lines), EDGE_BUFFER))
+    return shapely.union_all(np.concatenate(parts))
+
+
+class Isochrones:
+    """
+    Travel-time bands around campus landmarks, as polygons in an STRtree.
+
+    Each record is (landmark, mode, minutes, polygon); polygons are in meters around
+    ``center``. Looking up the band of many listings is a single bulk
+    point-in-polygon query against the tree.
+
+    >>> from shapely.geometry import box
+    >>> isochrones = Isochrones([('Union', 'walk', 5, box(-400, -400, 400, 400)),
+    ...                          ('Union', 'walk', 10, box(-800, -800, 800, 800))], center=(40.1092, -88.2272))
+    >>> isochrones.bands([40.1092, 40.1150, 40.2], [-88.2272, -88.2272, -88.2272], 'Union').tolist()
+    [5.0, 10.0, nan]
+    """
+
+    def __init__(self, records, center=REGION_CENTER):
+        from shapely.strtree import STRtree
+        self.records = list(records)
+        self.center = tuple(center)
+        self.tree = STRtree([polygon for _, _, _, polygon in self.records])
+        self._minutes = np.array([minutes for _, _, minutes, _ in self.records], dtype=float)
+
+    def __len__(self):
+        return len(self.records)
+
+    @classmethod
+    def build(cls, landmarks=None, bands=BANDS, modes=None, center=REGION_CENTER):
+        """
+        Compute the bands on the cached road graphs.
+
+        Every landmark and mode takes one Dijkstra search, bounded by the distance of
+        the widest band, from the landmark's nearest street node.
+        """
+        import networkx as nx
+        import osmnx as ox
+        landmarks = LANDMARKS if landmarks is None else landmarks
+        modes = MODES if modes is None else modes
+        records = []
+        for mode, (network_type, speed) in modes.items():
+            G = road_graph(network_type).graph
+            for landmark, (lat, lon) in landmarks.items():
+                source = ox.distance.nearest_nodes(G, lon, lat)
+                lengths = nx.single_source_dijkstra_path_length(G, source, cutoff=max(bands) * 60 * speed, weight='length')
+                for minutes in sorted(bands):
+                    reached = [node for node, length in lengths.items() if length <= minutes * 60 * speed]
+                    records.append((landmark, mode, minutes, reach_polygon(G, reached, center)))
+        return cls(records, center)
+
+    def bands(self, lats, lons, landmark, mode='walk'):
+        """
+        Return the smallest band (in minutes) of ``landmark`` that each location lies in.
+
+        Locations outside every band, or with unknown coordinates, get NaN.
+        """
+        import shapely
+        wanted = np.array([rec[0] == landmark and rec[1] == mode for rec in self.records], dtype=bool)
+        if not wanted.any():
+            raise ValueError(f"No {mode} isochrones for {landmark!r}")
+        x, y = project(lats, lons, self.center)
+        x, y = np.atleast_1d(x), np.atleast_1d(y)
+        result = np.full(len(x), np.nan)
+        known = np.flatnonzero(~(np.isnan(x) | np.isnan(y)))
+        if len(known) == 0:
+            return result
+        points, polygons = self.tree.query(shapely.points(x[known], y[known]), predicate='within')
+        keep = wanted[polygons]
+        # Bands are nested, so the smallest one containing a point is its band
+        smallest = np.full(len(x), np.inf)
+        np.minimum.at(smallest, known[points[keep]], self._minutes[polygons[keep]])
+        result[np.isfinite(smallest)] = smallest[np.isfinite(smallest)]
+        return result
+
+    def band(self, location, landmark, mode='walk'):
+        """Return the band (in minutes) of ``landmark`` that ``location`` lies in, or None."""
+        minutes = self.bands([location[0]], [location[1]], landmark, mode)[0]
+        return None if np.isnan(minutes) else int(minutes)
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump((self.records, self.center), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            records, center = pickle.load(f)
+        return cls(records, center)
+
+
+ISOCHRONES_PATH = os.path.join(CACHE_DIR, 'isochrones.pickle')
+
+_isochrones = None
+_isochrones_lock = threading.Lock()
+
+
+def campus_isochrones(path=ISOCHRONES_PATH):
+    """Return the shared Isochrones of the default landmarks, loaded from disk or built and saved on first use."""
+    global _isochrones
+    with _isochrones_lock:
+        if _isochrones is None:
+            if os.path.exists(path):
+                _isochrones = Isochrones.load(path)
+            else:
+                _isochrones = Isochrones.build()
+                _isochrones.save(path)
+        return _isochrones
+
+
+def add_commute_bands(listings, landmark='Illini Union', modes=('walk', 'bus'), isochrones=None, geocoder=None):
+    """
+    Add the commute band to ``landmark`` of every listing, one column per mode.
+
+    Parameters:
+    - listings (pandas.DataFrame): The combined listings.
+    - landmark (str, optional): One of the landmarks the isochrones were built for (default is 'Illini Union').
+    - modes (tuple, optional): The modes to add a column for (default is walk and bus).
+    - isochrones (Isochrones, optional): The bands to look up (default is campus_isochrones()).
+    - geocoder (geocoding.Geocoder, optional): Used to locate listings without coordinates.
+
+    Returns:
+    - pandas.DataFrame: A copy of ``listings`` with 'Walk_min' / 'Bus_min' columns holding the
+      smallest band (5, 10 or 15 minutes) the listing is in, NaN when it is farther.
+
+    Example:
+    ```python
+    Commute_apt = add_commute_bands(All_apt, landmark='Siebel Center')
+    Commute_apt[Commute_apt['Walk_min'] <= 10]
+    ```
+    """
+    if isochrones is None:
+        isochrones = campus_isochrones()
+    lats, lons = locate_listings(listings, geocoder)
+    banded = listings.copy()
+    for mode in modes:
+        banded[f'{mode.capitalize()}_min'] = isochrones.bands(lats, lons, landmark, mode)
+    return banded
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
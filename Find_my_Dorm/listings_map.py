@@ -0,0 +1,131 @@
+import html
+
+import numpy as np
+import pandas as pd
+
+from geocoding import locate_listings
+
+# Middle of campus, where the overview map opens
+CAMPUS_CENTER = (40.1020, -88.2272)
+# Upper bounds of the rent bins and their colors; rents above the last bound are red
+PRICE_BINS = [750, 1000, 1500, 2000]
+PRICE_COLORS = ['#1a9850', '#91cf60', '#fee08b', '#fc8d59', '#d73027']
+AGENCY_COLORS = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b', '#e377c2', '#7f7f7f']
+NO_PRICE_COLOR = '#999999'
+# Listing columns copied into every GeoJSON feature
+PROPERTIES = ['Address', 'Price', 'Bedroom', 'Bathroom', 'Name', 'Link']
+# Builds each marker in the browser from a [lat, lon, color, tooltip] row
+MARKER_CALLBACK = """function (row) {
+    var marker = L.circleMarker(new L.LatLng(row[0], row[1]),
+                                {radius: 7, color: row[2], fillColor: row[2], fillOpacity: 0.8, weight: 1});
+    marker.bindTooltip(row[3]);
+    return marker;
+}"""
+
+
+def price_colors(prices):
+    """
+    Return one color per rent, from green (cheap) to red (expensive).
+
+    >>> price_colors([700, 1200, float('nan'), 2500])
+    ['#1a9850', '#fee08b', '#999999', '#d73027']
+    """
+    prices = np.asarray(prices, dtype=float)
+    bins = np.searchsorted(PRICE_BINS, prices, side='left')
+    return [NO_PRICE_COLOR if np.isnan(price) else PRICE_COLORS[b] for price, b in zip(prices, bins)]
+
+
+def agency_colors(agencies):
+    """
+    Return one color per listing, the same for every listing of an agency.
+
+    >>> agency_colors(['MHM', 'JSM', 'MHM'])
+    ['#ff7f0e', '#1f77b4', '#ff7f0e']
+    """
+    palette = {name: AGENCY_COLORS[i % len(AGENCY_COLORS)] for i, name in enumerate(sorted(set(map(str, agencies))))}
+    return [palette[str(name)] for name in agencies]
+
+
+def _plain(value):
+    """
+    Turn a cell into a JSON-ready value: NumPy scalars become Python ones, and NaN,
+    None, NaT and pd.NA (nullable columns) all become None.
+
+    >>> _plain(np.int64(3)), _plain(np.nan), _plain(pd.NA), _plain(pd.NaT), _plain('x')
+    (3, None, None, None, 'x')
+    """
+    if pd.api.types.is_scalar(value) and pd.isna(value):
+        return None
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _tooltip(row):
+    price = 'price n/a' if row['Price'] is None else f"${row['Price']:,.0f}"
+    return html.escape(f"{row['Address']} - {row['Name']} - {price}")
+
+
+def listings_to_geojson(listings, color_by='Price', geocoder=None, precision=6):
+    """
+    Convert the combined listings into a GeoJSON FeatureCollection of located points.
+
+    Every feature carries the listing's address, price, bedrooms, bathrooms, agency,
+    link and marker color; listings that could not be located are left out.
+
+    Parameters:
+    - listings (pandas.DataFrame): The combined listings.
+    - color_by (str, optional): 'Price' or 'Name' (agency) (default is 'Price').
+    - geocoder (geocoding.Geocoder, optional): Used to locate the addresses (default is the shared one).
+    - precision (int, optional): Decimals kept per coordinate (default is 6).
+
+    Returns:
+    - dict: The FeatureCollection.
+    """
+    lats, lons = locate_listings(listings, geocoder)
+    colors = price_colors(listings['Price']) if color_by == 'Price' else agency_colors(listings[color_by])
+    records = listings[PROPERTIES].to_dict('records')
+    features = []
+    for lat, lon, color, record in zip(lats.tolist(), lons.tolist(), colors, records):
+        if np.isnan(lat) or np.isnan(lon):
+            continue
+        properties = {column: _plain(value) for column, value in record.items()}
+        properties['color'] = color
+        features.append({'type': 'Feature',
+                         'geometry': {'type': 'Point', 'coordinates': [round(lon, precision), round(lat, precision)]},
+                         'properties': properties})
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def overview_map(listings, color_by='Price', geocoder=None, zoom_start=14):
+    """
+    Draw every listing on one map, colored by rent or agency and clustered in the browser.
+
+    The markers are passed to the page as one compact array and built and clustered
+    client-side, so the map stays responsive with thousands of listings.
+
+    Parameters:
+    - listings (pandas.DataFrame): The combined listings.
+    - color_by (str, optional): 'Price' (green to red by rent) or 'Name' (one color per agency).
+    - geocoder (geocoding.Geocoder, optional): Used to locate the addresses (default is the shared one).
+    - zoom_start (int, optional): The initial zoom level (default is 14).
+
+    Returns:
+    - folium.Map: The overview map.
+
+    Example:
+    ```python
+    overview_map(All_apt, color_by='Name').save("all_listings.html")
+    ```
+    """
+    import folium
+    from folium.plugins import FastMarkerCluster
+    collection = listings_to_geojson(listings, color_by, geocoder)
+    rows = [[f['geometry']['coordinates'][1], f['geometry']['coordinates'][0], f['properties']['color'],
+             _tooltip(f['properties'])] for f in collection['features']]
+    m = folium.Map(location=CAMPUS_CENTER, zoom_start=zoom_start)
+    FastMarkerCluster(rows, callback=MARKER_CALLBACK, name='Listings').add_to(m)
+    return m
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
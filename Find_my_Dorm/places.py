@@ -0,0 +1,318 @@
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import config  # noqa: F401  (puts ./Apartments on the path)
+from address import address_key
+from http_cache import CACHE_DIR
+
+# Statuses (on googlemaps.exceptions.ApiError and friends) that mean "slow down"
+QUOTA_STATUSES = {'OVER_QUERY_LIMIT', 'RESOURCE_EXHAUSTED'}
+# Text Search is billed per request and limited per minute; 600/min is 10 per second
+DEFAULT_QPS = 10
+# Ratings move slowly, so a week-old one is still good enough to rank on
+RATING_TTL = 7 * 24 * 3600
+# Added to every listing search; a bare '108 E John' matches streets all over the country
+REGION = 'Champaign-Urbana, IL'
+
+
+class PlaceRating:
+    """
+    The Google Maps rating found for one query.
+
+    - query (str): What was searched for.
+    - rating (float): The place's rating, None if no place or no rating was found.
+    - reviews (int): How many ratings it is based on.
+    - place_id (str): Google's id of the place.
+    - error (str): Why the lookup failed, None if it did not.
+    """
+
+    __slots__ = ('query', 'rating', 'reviews', 'place_id', 'error')
+
+    def __init__(self, query, rating=None, reviews=None, place_id=None, error=None):
+        self.query = query
+        self.rating = rating
+        self.reviews = reviews
+        self.place_id = place_id
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    @classmethod
+    def from_response(cls, query, response):
+        """Build a PlaceRating from a ``places()`` response, using its best match."""
+        results = response.get('results') or []
+        if not results:
+            return cls(query)
+        best = results[0]
+        return cls(query, best.get('rating'), best.get('user_ratings_total'), best.get('place_id'))
+
+    def __repr__(self):
+        if self.error is not None:
+            return f"PlaceRating({self.query!r}, error={self.error!r})"
+        return f"PlaceRating({self.query!r}, rating={self.rating!r}, reviews={self.reviews!r}, place_id={self.place_id!r})"
+
+
+class TokenBucket:
+    """
+    Hands out at most ``rate`` tokens per second, with bursts of up to ``capacity``.
+
+    >>> bucket = TokenBucket(rate=1000, capacity=2)
+    >>> bucket.acquire(), bucket.acquire()
+    (0.0, 0.0)
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1, rate)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take a token, waiting for one if the bucket is empty; return the seconds waited."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            # A negative balance is a debt the caller sleeps off outside the lock
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if delay:
+            time.sleep(delay)
+        return delay
+
+
+def rating_key(address, agency=None, region=None):
+    """
+    The cache key of a listing: the key of its building (see address.address_key) plus its
+    agency and the region it was searched in.
+
+    >>> rating_key('501 E. Healey, Champaign', 'MHM') == rating_key('501 e healey champaign', 'mhm')
+    True
+    >>> rating_key('106 E John Street', 'JSM') == rating_key('106 E. John St', 'JSM')
+    True
+    >>> rating_key('108 E John', 'JSM', REGION)
+    '108 e john|jsm|champaign-urbana, il'
+    """
+    key = address_key(address)
+    for part in (agency, region):
+        key += f"|{' '.join(part.lower().split())}" if part else ''
+    return key
+
+
+class RatingCache:
+    """
+    A persistent SQLite cache of place ratings whose entries expire after ``ttl`` seconds.
+
+    Lookups that found no place are cached too; failed lookups are not.
+    ``hits``, ``misses`` and ``hit_rate`` count the lookups since it was opened.
+    """
+
+    def __init__(self, path=None, ttl=RATING_TTL):
+        self.path = path or os.path.join(CACHE_DIR, 'ratings.sqlite')
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute('CREATE TABLE IF NOT EXISTS ratings (key TEXT PRIMARY KEY, query TEXT, rating REAL, '
+                         'reviews INTEGER, place_id TEXT, stored_at REAL)')
+        self._db.commit()
+
+    def get(self, key):
+        """Return the cached PlaceRating for ``key``, or None if there is none or it expired."""
+        with self._lock:
+            row = self._db.execute('SELECT query, rating, reviews, place_id, stored_at FROM ratings WHERE key = ?',
+                                   (key,)).fetchone()
+            if row is None or row[4] + self.ttl < time.time():
+                self.misses += 1
+                return None
+            self.hits += 1
+        return PlaceRating(*row[:4])
+
+    def put(self, key, place):
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO ratings VALUES (?, ?, ?, ?, ?, ?)',
+                             (key, place.query, place.rating, place.reviews, place.place_id, time.time()))
+            self._db.commit()
+
+    def purge(self):
+        """Delete the expired entries and return how many there were."""
+        with self._lock:
+            deleted = self._db.execute('DELETE FROM ratings WHERE stored_at < ?', (time.time() - self.ttl,)).rowcount
+            self._db.commit()
+        return deleted
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM ratings').fetchone()[0]
+
+
+class QuotaExceeded(Exception):
+    """Raised by StaticPlacesClient to stand in for Google's OVER_QUERY_LIMIT error."""
+
+    status = 'OVER_QUERY_LIMIT'
+
+
+class StaticPlacesClient:
+    """
+    A local stand-in for ``googlemaps.Client``, answering ``places()`` from a dict.
+
+    Parameters:
+    - places (dict): Query -> result dict (with 'rating', 'user_ratings_total', 'place_id').
+    - latency (float, optional): Seconds each call takes, to mimic the network.
+    - quota_errors (int, optional): Fail this many calls with QuotaExceeded first.
+    """
+
+    def __init__(self, places, latency=0.0, quota_errors=0):
+        self.places_by_query = dict(places)
+        self.latency = latency
+        self.quota_errors = quota_errors
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def places(self, query):
+        with self._lock:
+            self.calls += 1
+            fail = self.quota_errors > 0
+            self.quota_errors -= fail
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            raise QuotaExceeded(query)
+        result = self.places_by_query.get(query)
+        return {'results': [result] if result else [], 'status': 'OK' if result else 'ZERO_RESULTS'}
+
+
+class PlacesFetcher:
+    """
+    Looks up Google Maps ratings concurrently within the Places quota.
+
+    Requests run on a bounded thread pool and each takes a token from a bucket
+    refilled at ``qps`` per second. A quota error is retried with exponential
+    backoff; any other error is reported on the PlaceRating instead of raised.
+
+    Parameters:
+    - client: A ``googlemaps.Client`` or anything with a ``places(query)`` method.
+    - max_workers (int, optional): Requests in flight at once (default is 8).
+    - qps (float, optional): Requests per second allowed by the quota (default is DEFAULT_QPS).
+    - max_retries (int, optional): Retries of a request after quota errors (default is 5).
+    - backoff (float, optional): Seconds before the first retry; doubled for each next one.
+    - cache (RatingCache, optional): Where ratings are reused from between runs.
+    - region (str, optional): Added to the searches of fetch_listings (default is REGION, None adds nothing).
+
+    >>> client = StaticPlacesClient({'Hub on Campus': {'rating': 4.1, 'user_ratings_total': 210, 'place_id': 'p1'}},
+    ...                             quota_errors=1)
+    >>> fetcher = PlacesFetcher(client, backoff=0.01)
+    >>> fetcher.fetch_many(['Hub on Campus', 'Nowhere'])
+    [PlaceRating('Hub on Campus', rating=4.1, reviews=210, place_id='p1'), PlaceRating('Nowhere', rating=None, reviews=None, place_id=None)]
+    >>> fetcher.retries, client.calls
+    (1, 3)
+    """
+
+    def __init__(self, client, max_workers=8, qps=DEFAULT_QPS, max_retries=5, backoff=0.5, cache=None, region=REGION):
+        self.client = client
+        self.max_workers = max_workers
+        self.bucket = TokenBucket(qps)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.cache = cache
+        self.region = region
+        self.retries = 0
+        self.merged = 0
+        self._lock = threading.Lock()
+
+    def fetch(self, query):
+        """Look up one query and return its PlaceRating."""
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            try:
+                return PlaceRating.from_response(query, self.client.places(query))
+            except Exception as e:
+                if getattr(e, 'status', None) not in QUOTA_STATUSES:
+                    return PlaceRating(query, error=f"{type(e).__name__}: {e}")
+                if attempt == self.max_retries:
+                    return PlaceRating(query, error=f"quota still exceeded after {attempt} retries")
+                with self._lock:
+                    self.retries += 1
+                time.sleep(self.backoff * 2 ** attempt)
+
+    def fetch_many(self, queries, keys=None):
+        """
+        Look up many queries concurrently; the results are in the order of ``queries``.
+
+        Queries with the same key (by default address.address_key of the query) are sent once, and
+        keys found in the cache are not sent at all.
+        """
+        queries = list(queries)
+        keys = [address_key(query) for query in queries] if keys is None else list(keys)
+        unique = {}
+        for key, query in zip(keys, queries):
+            unique.setdefault(key, query)
+        with self._lock:
+            self.merged += len(keys) - len(unique)
+        found = {}
+        if self.cache is not None:
+            for key in unique:
+                place = self.cache.get(key)
+                if place is not None:
+                    found[key] = place
+        missing = [key for key in unique if key not in found]
+        if len(missing) <= 1:
+            fetched = [self.fetch(unique[key]) for key in missing]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(missing))) as pool:
+                fetched = list(pool.map(self.fetch, [unique[key] for key in missing]))
+        for key, place in zip(missing, fetched):
+            found[key] = place
+            if self.cache is not None and place.ok:
+                self.cache.put(key, place)
+        return [found[key] for key in keys]
+
+    def fetch_listings(self, listings):
+        """
+        Look up the ratings of (address, agency) pairs, searching for the full address, the
+        region and the agency. The region is part of the cache key, so ratings found by a
+        search without it are not reused.
+
+        >>> import tempfile
+        >>> client = StaticPlacesClient({'501 E Healey, Champaign-Urbana, IL, MHM':
+        ...                              {'rating': 3.9, 'user_ratings_total': 12, 'place_id': 'p2'}})
+        >>> cache = RatingCache(os.path.join(tempfile.mkdtemp(), 'ratings.sqlite'))
+        >>> fetcher = PlacesFetcher(client, cache=cache)
+        >>> [place.rating for place in fetcher.fetch_listings([('501 E Healey', 'MHM'), ('501 E. Healey', 'mhm')])]
+        [3.9, 3.9]
+        >>> fetcher.fetch_listings([('501 E Healey', 'MHM')])[0].reviews, client.calls, fetcher.merged, cache.hit_rate
+        (12, 1, 1, 0.5)
+        """
+        listings = list(listings)
+        return self.fetch_many([', '.join(part for part in (address, self.region, agency) if part)
+                                for address, agency in listings],
+                               [rating_key(address, agency, self.region) for address, agency in listings])
+
+
+_default_cache = None
+
+
+def default_rating_cache():
+    """Return the shared on-disk rating cache."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = RatingCache()
+    return _default_cache
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
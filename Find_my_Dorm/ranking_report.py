@@ -0,0 +1,157 @@
+import html
+import os
+
+import pandas as pd
+
+RANKING_COLUMNS = ['Ranking', 'Apartment Name', 'Agency Name', 'Rating']
+TITLE = 'The Ranking of Apartments in Champaign'
+# Rows drawn on one PNG page; a page stays readable and renders in a fraction of a second
+ROWS_PER_PAGE = 40
+# Relative widths of the table columns on a page
+COLUMN_WIDTHS = [0.12, 0.48, 0.25, 0.15]
+HEADER_COLOR = '#40466e'
+STRIPE_COLOR = '#f1f1f2'
+
+
+def rank_listings(rated_list):
+    """
+    Turn rated listings into a ranking table, best rated first.
+
+    Parameters:
+    - rated_list (list of str): Listings as "Address, Agency Name, Rating", as returned by
+      ``append_ratings_to_listings``. Entries without a numeric rating are left out.
+
+    Returns:
+    - pandas.DataFrame: The RANKING_COLUMNS, ranked 1, 2, ... by descending rating.
+
+    >>> rank_listings(['54 E Green St, JSM, 4.1', '106 E John St, Wampler, 4.6', '1 Main St, MHM, null'])
+       Ranking Apartment Name Agency Name  Rating
+    0        1  106 E John St     Wampler     4.6
+    1        2  54 E Green St         JSM     4.1
+    """
+    # Split at the last two commas, so an address with a comma stays whole
+    parts = pd.Series(list(rated_list), dtype=object).str.rsplit(', ', n=2, expand=True)
+    if parts.shape[1] < 3:
+        return pd.DataFrame(columns=RANKING_COLUMNS)
+    ranking = pd.DataFrame({'Apartment Name': parts[0], 'Agency Name': parts[1],
+                            'Rating': pd.to_numeric(parts[2], errors='coerce')})
+    ranking = ranking.dropna(subset=['Rating']).sort_values('Rating', ascending=False, kind='stable')
+    ranking.insert(0, 'Ranking', range(1, len(ranking) + 1))
+    return ranking.reset_index(drop=True)
+
+
+def render_page(ranking, page=0, rows_per_page=ROWS_PER_PAGE, title=TITLE):
+    """
+    Draw one page of the ranking as a table, without a display.
+
+    The figure is a bare Agg-backed ``matplotlib.figure.Figure``, so it works headless
+    (on a server or in CI) and does not pile up in pyplot's list of open figures.
+    Cells are plain text over one collection of row stripes; ``ax.table`` builds a
+    patch per cell and measures each one, which takes about half again as long.
+
+    Returns:
+    - matplotlib.figure.Figure: The page, e.g. for ``fig.savefig('page.png')``.
+    """
+    import numpy as np
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.collections import PolyCollection
+    from matplotlib.figure import Figure
+    pages = max(1, -(-len(ranking) // rows_per_page))
+    rows = ranking.iloc[page * rows_per_page:(page + 1) * rows_per_page]
+    # Every page has the height of a full one, so the pages of a report line up
+    fig = Figure(figsize=(10, 0.3 * (rows_per_page + 3)))
+    FigureCanvasAgg(fig)
+    ax = fig.add_axes([0.03, 0.02, 0.94, 0.9])
+    ax.axis('off')
+    # One unit per row, the header in row 0, counted downwards
+    ax.set_xlim(0, 1)
+    ax.set_ylim(rows_per_page + 1, 0)
+    stripes = [0] + list(range(2, len(rows) + 1, 2))
+    ax.add_collection(PolyCollection([[(0, y), (1, y), (1, y + 1), (0, y + 1)] for y in stripes],
+                                     facecolors=[HEADER_COLOR] + [STRIPE_COLOR] * (len(stripes) - 1)))
+    edges = np.cumsum([0] + COLUMN_WIDTHS)
+    for x, column in zip((edges[:-1] + edges[1:]) / 2, rows.columns):
+        ax.text(x, 0.5, column, ha='center', va='center', fontsize=11, color='white', weight='bold')
+        for y, value in enumerate(rows[column].astype(str), start=1):
+            ax.text(x, y + 0.5, value, ha='center', va='center', fontsize=11)
+    fig.suptitle(f"{title} (page {page + 1} of {pages})" if pages > 1 else title,
+                 fontsize=16, weight='bold', y=0.98)
+    return fig
+
+
+def save_pages(ranking, directory, rows_per_page=ROWS_PER_PAGE, title=TITLE, dpi=100):
+    """Render the whole ranking to ``ranking_page_<n>.png`` files in ``directory`` and return their paths."""
+    os.makedirs(directory, exist_ok=True)
+    pages = max(1, -(-len(ranking) // rows_per_page))
+    paths = []
+    for page in range(pages):
+        path = os.path.join(directory, f'ranking_page_{page + 1}.png')
+        render_page(ranking, page, rows_per_page, title).savefig(path, dpi=dpi)
+        paths.append(path)
+    return paths
+
+
+def ranking_html(ranking, title=TITLE):
+    """
+    Return the whole ranking as a standalone HTML page, one table row per listing.
+
+    >>> '<td>106 E John St</td>' in ranking_html(rank_listings(['106 E John St, Wampler, 4.6']))
+    True
+    """
+    table = ranking.to_html(index=False, border=0, classes='ranking')
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{html.escape(title)}</title>
+<style>
+body {{ font-family: sans-serif; }}
+table.ranking {{ border-collapse: collapse; }}
+table.ranking th {{ background: {HEADER_COLOR}; color: white; position: sticky; top: 0; }}
+table.ranking th, table.ranking td {{ padding: 4px 12px; text-align: center; }}
+table.ranking tr:nth-child(even) td {{ background: {STRIPE_COLOR}; }}
+</style>
+</head>
+<body>
+<h1>{html.escape(title)}</h1>
+{table}
+</body>
+</html>
+"""
+
+
+def write_report(ranking, directory, formats=('png', 'html', 'csv'), rows_per_page=ROWS_PER_PAGE, title=TITLE):
+    """
+    Write the ranking to ``directory`` in the given formats.
+
+    Parameters:
+    - ranking (pandas.DataFrame): The table built by rank_listings.
+    - directory (str): Where the files go; created if needed.
+    - formats (tuple, optional): Any of 'png' (one image per page of ``rows_per_page`` rows),
+      'html' (ranking.html) and 'csv' (ranking.csv).
+
+    Returns:
+    - list: The paths of the files written.
+    """
+    unknown = set(formats) - {'png', 'html', 'csv'}
+    if unknown:
+        raise ValueError(f"Unknown report formats: {sorted(unknown)}")
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    if 'csv' in formats:
+        path = os.path.join(directory, 'ranking.csv')
+        ranking.to_csv(path, index=False)
+        paths.append(path)
+    if 'html' in formats:
+        path = os.path.join(directory, 'ranking.html')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(ranking_html(ranking, title))
+        paths.append(path)
+    if 'png' in formats:
+        paths.extend(save_pages(ranking, directory, rows_per_page, title))
+    return paths
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,145 @@
+import math
+import os
+import pickle
+import threading
+
+import numpy as np
+
+import config  # noqa: F401  (puts ./Apartments on the path)
+from http_cache import CACHE_DIR
+
+# Middle of Champaign-Urbana, and how far around it the regional graph reaches (meters)
+REGION_CENTER = (40.1106, -88.2272)
+REGION_DIST = 7000
+EARTH_RADIUS = 6371008.8
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """
+    Great-circle distance in meters, element-wise over arrays of coordinates.
+
+    >>> haversine([40.1106, 40.1106], [-88.2272, -88.2272], [40.1106, 40.1116], [-88.2272, -88.2272]).round(1).tolist()
+    [0.0, 111.2]
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(a, dtype=float)) for a in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(a))
+
+
+def project(lats, lons, center=REGION_CENTER):
+    """
+    Project coordinates to meters east (x) and north (y) of ``center``.
+
+    The plane is tangent at the center, which is accurate to well under a meter
+    across Champaign-Urbana.
+
+    >>> x, y = project([40.1106, 40.1116], [-88.2272, -88.2272])
+    >>> x.round(1).tolist(), y.round(1).tolist()
+    ([0.0, 0.0], [0.0, 111.2])
+    """
+    lat0, lon0 = center
+    x = np.radians(np.asarray(lons, dtype=float) - lon0) * EARTH_RADIUS * math.cos(math.radians(lat0))
+    y = np.radians(np.asarray(lats, dtype=float) - lat0) * EARTH_RADIUS
+    return x, y
+
+
+class RoadGraph:
+    """
+    The Champaign-Urbana road network, downloaded once and kept on disk.
+
+    The graph is pickled (a fast binary format, much quicker to load than GraphML)
+    and only loaded when it is first needed. Requests then cut a small subgraph
+    around an address out of it in memory instead of asking Overpass again.
+
+    Parameters:
+    - network_type (str, optional): OSMnx network type, e.g. 'drive' or 'walk' (default is 'drive').
+    - center (tuple, optional): (latitude, longitude) of the region center.
+    - dist (float, optional): Half the side of the region's bounding box, in meters.
+    - path (str, optional): Where the pickled graph is stored.
+    """
+
+    def __init__(self, network_type='drive', center=REGION_CENTER, dist=REGION_DIST, path=None):
+        self.network_type = network_type
+        self.center = center
+        self.dist = dist
+        self.path = path or os.path.join(CACHE_DIR, f'road_graph_{network_type}.pickle')
+        self._graph = None
+        self._lock = threading.Lock()
+
+    @property
+    def graph(self):
+        """The full regional graph, loaded from disk (or built and saved) on first use."""
+        with self._lock:
+            if self._graph is None:
+                if os.path.exists(self.path):
+                    with open(self.path, 'rb') as f:
+                        graph = pickle.load(f)
+                else:
+                    graph = self.build()
+                self._set_graph(graph)
+            return self._graph
+
+    def _set_graph(self, graph):
+        self._graph = graph
+        self.node_ids = np.array(list(graph.nodes))
+        self.node_lats = np.array([data['y'] for _, data in graph.nodes(data=True)])
+        self.node_lons = np.array([data['x'] for _, data in graph.nodes(data=True)])
+
+    def build(self):
+        """Download the regional graph from OpenStreetMap and save it to disk."""
+        import osmnx as ox
+        graph = ox.graph_from_point(self.center, dist=self.dist, network_type=self.network_type)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(graph, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+        return graph
+
+    def rebuild(self):
+        """Download the graph again, e.g. after the street network changed."""
+        with self._lock:
+            self._set_graph(self.build())
+        return self._graph
+
+    def nodes_near(self, location, dist):
+        """Return the ids of the nodes inside the ``dist``-meter bounding box around ``location``."""
+        graph = self.graph
+        lat, lon = location
+        dlat = math.degrees(dist / EARTH_RADIUS)
+        dlon = math.degrees(dist / (EARTH_RADIUS * math.cos(math.radians(lat))))
+        inside = ((np.abs(self.node_lats - lat) <= dlat) & (np.abs(self.node_lons - lon) <= dlon))
+        return self.node_ids[inside]
+
+    def subgraph(self, location, dist):
+        """
+        Return an independent copy of the part of the graph around ``location``.
+
+        Like ``ox.graph_from_point(location, dist=dist)`` this keeps the nodes inside
+        the ``dist``-meter bounding box and, as its default ``retain_all=False`` does,
+        only the largest weakly connected component of them. Streets that leave the box
+        would otherwise strand fragments that routing treats as unreachable. It costs
+        no network I/O.
+        """
+        import networkx as nx
+        cut = self.graph.subgraph(self.nodes_near(location, dist).tolist())
+        if len(cut) == 0:
+            return cut.copy()
+        return cut.subgraph(max(nx.weakly_connected_components(cut), key=len)).copy()
+
+
+_graphs = {}
+_graphs_lock = threading.Lock()
+
+
+def road_graph(network_type='drive'):
+    """Return the shared RoadGraph for ``network_type``."""
+    with _graphs_lock:
+        if network_type not in _graphs:
+            _graphs[network_type] = RoadGraph(network_type)
+        return _graphs[network_type]
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
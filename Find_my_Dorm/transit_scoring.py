@@ -0,0 +1,171 @@
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from bus_stop_index import bus_stop_index
+from Find_Bus_Stops_Function import snap_bus_stops
+from geocoding import locate_listings
+from road_graph import haversine, road_graph
+
+# Walking distance (meters) past which a stop no longer counts as reachable
+MAX_WALK = 1500
+# Origins handed to a worker process at a time
+CHUNK_SIZE = 64
+
+# Set in every worker process by _init_worker
+_graph = None
+_stop_ids = None
+
+# network_type -> (BusStopIndex it was snapped from, graph, stop ids)
+_transit_graphs = {}
+_transit_graphs_lock = threading.Lock()
+
+
+def transit_graph(network_type='walk'):
+    """
+    Return the regional graph with every bus stop of the index snapped onto it.
+
+    The graph is built once per network type and shared, like road_graph(); it is
+    built again only when the bus stop index was rebuilt. Treat it as read-only.
+
+    Returns:
+    - tuple: The graph and the set of its bus stop node ids.
+    """
+    stops = bus_stop_index()
+    with _transit_graphs_lock:
+        cached = _transit_graphs.get(network_type)
+        if cached is None or cached[0] is not stops:
+            G = road_graph(network_type).graph.copy()
+            snap_bus_stops(G, stops.ids.tolist(), stops.lats, stops.lons)
+            cached = _transit_graphs[network_type] = (stops, G, frozenset(stops.ids.tolist()))
+        return cached[1], cached[2]
+
+
+def stop_distances(G, stop_ids, origin, max_dist=MAX_WALK):
+    """
+    Return the sorted network distances in meters from ``origin`` to the stops within ``max_dist``.
+
+    The search is a Dijkstra bounded by ``max_dist``, so only the streets around the
+    origin are explored. It is one search per origin rather than one multi-source
+    search from all stops: a multi-source search only yields the single nearest stop
+    of every node, while a listing needs its few nearest stops and the count within a radius.
+
+    Doctests:
+    >>> import networkx as nx
+    >>> G = nx.MultiDiGraph()
+    >>> G.add_edge('home', 'corner', length=100.0)
+    0
+    >>> G.add_edge('corner', 'stop_a', length=50.0)
+    0
+    >>> G.add_edge('corner', 'stop_b', length=2000.0)
+    0
+    >>> stop_distances(G, {'stop_a', 'stop_b'}, 'home').tolist()
+    [150.0]
+    """
+    import networkx as nx
+    lengths = nx.single_source_dijkstra_path_length(G, origin, cutoff=max_dist, weight='length')
+    return np.sort(np.array([length for node, length in lengths.items() if node in stop_ids], dtype=float))
+
+
+def _init_worker(G, stop_ids):
+    global _graph, _stop_ids
+    _graph, _stop_ids = G, stop_ids
+
+
+def _score_chunk(origins, max_dist):
+    return [stop_distances(_graph, _stop_ids, origin, max_dist) for origin in origins]
+
+
+def score_locations(lats, lons, n_nearest=3, radius=400, max_dist=MAX_WALK, network_type='walk', max_workers=None):
+    """
+    Score many locations at once by how well they are served by buses.
+
+    Every location is snapped to the nearest node of one shared walking graph that has
+    all bus stops attached. Each distinct origin node gets one bounded search (see
+    stop_distances for why not a multi-source one); locations that snap to the same
+    node share it, and the searches run in a process pool.
+
+    Parameters:
+    - lats, lons (array-like): The locations' latitudes and longitudes.
+    - n_nearest (int, optional): How many nearest stops to report distances for (default is 3).
+    - radius (float, optional): Walking distance in meters within which stops are counted (default is 400).
+    - max_dist (float, optional): Walking distance in meters beyond which stops are ignored.
+    - network_type (str, optional): The cached graph to walk on (default is 'walk').
+    - max_workers (int, optional): Worker processes; 1 runs everything in this process.
+
+    Returns:
+    - tuple: An (n, n_nearest) array of walking distances in meters to the nearest stops
+      (NaN when there are fewer stops within max_dist), and an array of stop counts within radius.
+    """
+    import osmnx as ox
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    nearest = np.full((len(lats), n_nearest), np.nan)
+    counts = np.zeros(len(lats), dtype=np.int64)
+    located = np.flatnonzero(~(np.isnan(lats) | np.isnan(lons)))
+    if len(located) == 0:
+        return nearest, counts
+
+    G, stop_ids = transit_graph(network_type)
+    nodes = np.asarray(ox.distance.nearest_nodes(G, lons[located], lats[located]))
+    # The walk from the door to the nearest street node
+    offsets = haversine(lats[located], lons[located],
+                        [G.nodes[n]['y'] for n in nodes], [G.nodes[n]['x'] for n in nodes])
+    origins, inverse = np.unique(nodes, return_inverse=True)
+    origins = origins.tolist()
+
+    if max_workers == 1 or len(origins) <= CHUNK_SIZE:
+        _init_worker(G, stop_ids)
+        distances = _score_chunk(origins, max_dist)
+    else:
+        chunks = [origins[i:i + CHUNK_SIZE] for i in range(0, len(origins), CHUNK_SIZE)]
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(G, stop_ids)) as pool:
+            distances = [d for chunk in pool.map(_score_chunk, chunks, [max_dist] * len(chunks)) for d in chunk]
+
+    for row, origin, offset in zip(located, inverse.ravel(), offsets):
+        walk = distances[origin] + offset
+        walk = walk[walk <= max_dist]
+        nearest[row, :min(n_nearest, len(walk))] = walk[:n_nearest]
+        counts[row] = np.count_nonzero(walk <= radius)
+    return nearest, counts
+
+
+def score_listings(listings, n_nearest=3, radius=400, max_dist=MAX_WALK, geocoder=None, max_workers=None):
+    """
+    Add transit-accessibility columns to the combined listings.
+
+    Parameters:
+    - listings (pandas.DataFrame): The combined listings, with an 'Address' column.
+    - n_nearest (int, optional): How many nearest stops to report distances for (default is 3).
+    - radius (float, optional): Walking distance in meters within which stops are counted (default is 400).
+    - max_dist (float, optional): Walking distance in meters beyond which stops are ignored.
+    - geocoder (geocoding.Geocoder, optional): Used to locate the addresses (default is the shared one).
+    - max_workers (int, optional): Worker processes for the searches (default is one per CPU).
+
+    Returns:
+    - pandas.DataFrame: A copy of ``listings`` with 'Latitude', 'Longitude', 'Walk_stop_1'
+      to 'Walk_stop_<n_nearest>' (meters, NaN if none within max_dist) and 'Stops_nearby'
+      (stops within radius) columns.
+
+    Example:
+    ```python
+    Scored_apt = score_listings(All_apt)
+    Scored_apt[(Scored_apt['Walk_stop_1'] < 200) & (Scored_apt['Price'] < 1000)]
+    ```
+    """
+    lats, lons = locate_listings(listings, geocoder)
+    nearest, counts = score_locations(lats, lons, n_nearest, radius, max_dist, max_workers=max_workers)
+
+    scored = listings.copy()
+    scored['Latitude'] = lats
+    scored['Longitude'] = lons
+    for i in range(n_nearest):
+        scored[f'Walk_stop_{i + 1}'] = nearest[:, i]
+    scored['Stops_nearby'] = counts
+    return scored
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()